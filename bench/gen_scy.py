@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# generate a synthetic .scy file and design with a configurable tree shape
+
+import argparse
+from pathlib import Path
+
+def gen_sequence(width: int, depth: int, enables: int) -> "tuple[list[str], int]":
+    lines: "list[str]" = []
+    covers = 0
+    pending = enables
+
+    def add_level(level: int):
+        nonlocal covers, pending
+        for _ in range(width):
+            lines.append(f"{'  ' * level}cover c_{covers}" + (":" if level + 1 < depth or pending else ""))
+            covers += 1
+            if pending:
+                pending -= 1
+                lines.append(f"{'  ' * (level + 1)}enable e_{pending}")
+            if level + 1 < depth:
+                add_level(level + 1)
+
+    add_level(0)
+    return (lines, covers)
+
+def gen_design(covers: int, enables: int) -> "list[str]":
+    lines = [
+        "module bench (input clock, input reset, output [15:0] value);",
+        "\treg [15:0] count = 0;",
+        "\tassign value = count;",
+        "\talways @(posedge clock) begin",
+        "\t\tcount <= reset ? 0 : count + 1;",
+        "\t\tif (!reset) begin",
+    ]
+    lines += [f"\t\t\tc_{i}: cover(count == {i + 1});" for i in range(covers)]
+    lines += [f"\t\t\te_{i}: assume(count != {covers + i + 1});" for i in range(enables)]
+    lines += ["\t\tend", "\tend", "endmodule"]
+    return lines
+
+def gen_scy(outdir: Path, width: int, depth: int, enables: int, name: str = "bench") -> Path:
+    (sequence, covers) = gen_sequence(width, depth, enables)
+    outdir.mkdir(parents=True, exist_ok=True)
+    (outdir / "bench.sv").write_text("\n".join(gen_design(covers, enables)) + "\n")
+    scyfile = outdir / f"{name}.scy"
+    scyfile.write_text("\n".join([
+        "[options]",
+        "depth 40",
+        "",
+        "[design]",
+        "read -formal bench.sv",
+        "prep -top bench",
+        "",
+        "[files]",
+        "bench.sv",
+        "",
+        "[sequence]",
+        *sequence,
+        "",
+    ]))
+    return scyfile
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("outdir", type=Path)
+    parser.add_argument("--width", type=int, default=2, help="children per cover")
+    parser.add_argument("--depth", type=int, default=3, help="levels of nested covers")
+    parser.add_argument("--enables", type=int, default=0, help="number of enable cells")
+    args = parser.parse_args()
+    print(gen_scy(args.outdir, args.width, args.depth, args.enables))
+
+if __name__ == "__main__":
+    main()
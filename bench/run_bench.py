@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# measure scy's own overhead on synthetic trees, using stub tools in place of sby and yosys
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from gen_scy import gen_scy
+
+bench_dir = Path(__file__).absolute().parent
+stub_dir = bench_dir / "stubs"
+
+def measure(phase: str, func) -> "tuple[dict, object]":
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    wall_time = time.perf_counter() - start
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ({"phase": phase, "wall_time": wall_time, "peak_memory": peak}, result)
+
+def measure_scy(phase: str, args: "list[str]", cwd: Path, env: "dict[str, str]") -> dict:
+    logfile = cwd / f"{phase}.log"
+    with open(logfile, "w") as f:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-m", "scy.scy"] + args, cwd=cwd, env=env,
+                                stdout=f, stderr=subprocess.STDOUT)
+        # wait4 gives the resource usage of this child alone
+        (_, status, usage) = os.wait4(proc.pid, 0)
+        wall_time = time.perf_counter() - start
+    proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    return {"phase": phase, "wall_time": wall_time, "peak_memory": usage.ru_maxrss * 1024,
+            "cpu_time": usage.ru_utime + usage.ru_stime, "returncode": proc.returncode}
+
+def run_bench(args: argparse.Namespace, workdir: Path) -> "list[dict]":
+    results = []
+    (result, scyfile) = measure("generate", lambda: gen_scy(workdir, args.width, args.depth, args.enables))
+    results.append(result)
+
+    from scy.scy_config_parser import SCYConfig
+    from scy.scy_task_tree import TaskTree
+    (result, scycfg) = measure("parse", lambda: SCYConfig(scyfile.read_text()))
+    results.append(result)
+    (result, nodes) = measure("tree", lambda: [task.dir for task in TaskTree.make_common(
+        children=scycfg.sequence).traverse()])
+    result["nodes"] = len(nodes)
+    results.append(result)
+
+    env = dict(os.environ)
+    env["PATH"] = f"{stub_dir}{os.pathsep}{env['PATH']}"
+    env["SCY_BENCH_LATENCY"] = str(args.latency)
+    env["SCY_BENCH_STEPS"] = str(args.steps)
+    jobs = ["-j", str(args.jobs)] if args.jobs else []
+
+    results.append(measure_scy("setup", jobs + ["-f", "-d", "setup", "--setup", scyfile.name],
+                               workdir, env))
+    stats_json = workdir / "stats.json"
+    run_result = measure_scy("run", jobs + ["-f", "-d", "run", "--stats-json", str(stats_json),
+                                            scyfile.name], workdir, env)
+    if stats_json.exists():
+        totals = json.loads(stats_json.read_text())["totals"]
+        run_result["sby_runs"] = totals["sby_runs"]
+        # time the stub solvers were busy, the rest of the run is scy
+        run_result["solver_wall_time"] = totals["solver_wall_time"]
+    results.append(run_result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=2, help="children per cover")
+    parser.add_argument("--depth", type=int, default=3, help="levels of nested covers")
+    parser.add_argument("--enables", type=int, default=0, help="number of enable cells")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each stub sby run takes")
+    parser.add_argument("--steps", type=int, default=3, help="steps reported by each stub sby run")
+    parser.add_argument("-j", type=int, dest="jobs", help="jobs passed to scy")
+    parser.add_argument("--repeat", type=int, default=1, help="number of runs to average over")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.repeat):
+        workdir = Path(tempfile.mkdtemp(prefix="scy_bench_"))
+        try:
+            runs.append(run_bench(args, workdir))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = []
+    for phase_runs in zip(*runs):
+        result = dict(phase_runs[-1])
+        result["wall_time"] = sum(run["wall_time"] for run in phase_runs) / len(phase_runs)
+        result["peak_memory"] = max(run["peak_memory"] for run in phase_runs)
+        results.append(result)
+
+    for result in results:
+        extra = ""
+        if "nodes" in result:
+            extra += f"  {result['nodes']} nodes"
+        if "sby_runs" in result:
+            extra += f"  {result['sby_runs']} sby runs, {result['solver_wall_time']:.2f}s in stubs"
+        if result.get("returncode"):
+            extra += f"  FAILED (rc={result['returncode']})"
+        print(f"{result['phase']:10} {result['wall_time']:8.3f}s {result['peak_memory'] / 2**20:8.1f} MiB{extra}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": {k: v for (k, v) in vars(args).items() if k != "json"},
+                       "results": results}, f, indent=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# run scy end to end on the bundled examples or other .scy files and compare the results
+
+import argparse
+import json
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+example_dir = Path(__file__).absolute().parent.parent / "example"
+
+# updn_cntr has no .scy file of its own, its tests generate one
+updn_cntr_scy = """\
+[design]
+read -sv up_counter.sv
+prep -top up_counter
+
+[files]
+up_counter.sv
+
+[sequence]
+cover cp_7:
+    cover cp_3
+    cover cp_14:
+        cover cp_12
+
+[file cover_stmts.vh]
+    if (!reset) begin
+        cp_3: cover(count==3);
+        cp_7: cover(count==7);
+        cp_12: cover(count==12);
+        cp_14: cover(count==14);
+    end
+"""
+
+examples = {
+    "updn_cntr": (example_dir / "updn_cntr", None),
+    "hpm-test": (example_dir / "hpm-test", "hpm-test.scy"),
+    "axixfer": (example_dir / "axixfer", "axixfer.scy"),
+}
+
+def prepare(target: str, rundir: Path) -> Path:
+    # copy the sources so runs never share a workdir
+    if target in examples:
+        (srcdir, scyfile) = examples[target]
+    else:
+        srcdir = Path(target).absolute().parent
+        scyfile = Path(target).name
+    shutil.copytree(srcdir, rundir)
+    if scyfile is None:
+        scyfile = f"{target}.scy"
+        (rundir / scyfile).write_text(updn_cntr_scy)
+    return rundir / scyfile
+
+def summary(values: "list[float]") -> dict:
+    return {
+        "median": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "runs": len(values),
+    }
+
+def run_target(target: str, args: argparse.Namespace) -> dict:
+    wall_times: "list[float]" = []
+    node_times: "dict[str, list[float]]" = {}
+    failures = 0
+    for i in range(args.repeat):
+        tmpdir = Path(tempfile.mkdtemp(prefix="scy_examples_"))
+        try:
+            scyfile = prepare(target, tmpdir / "src")
+            stats_json = tmpdir / "stats.json"
+            scy_args = shlex.split(args.scy) + ["-f", "-j", str(args.jobs), "-d", "run",
+                                                 "--stats-json", str(stats_json)]
+            scy_args += shlex.split(args.args) + [scyfile.name]
+            start = time.perf_counter()
+            proc = subprocess.run(scy_args, cwd=scyfile.parent, capture_output=True)
+            wall_times.append(time.perf_counter() - start)
+            if proc.returncode != 0:
+                failures += 1
+            if stats_json.exists():
+                for node in json.loads(stats_json.read_text())["nodes"]:
+                    node_times.setdefault(node["chunk"], []).append(node.get("wall_time") or 0)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        print(f"{target}: run {i + 1}/{args.repeat} took {wall_times[-1]:.2f}s", file=sys.stderr)
+    return {
+        "wall_time": summary(wall_times),
+        "failures": failures,
+        "nodes": {chunk: summary(times) for (chunk, times) in node_times.items()},
+    }
+
+def cmd_run(args: argparse.Namespace):
+    targets = args.targets or list(examples)
+    results = {
+        "label": args.label,
+        "config": {"scy": args.scy, "args": args.args, "jobs": args.jobs, "repeat": args.repeat},
+        "targets": {target: run_target(target, args) for target in targets},
+    }
+    for (target, result) in results["targets"].items():
+        wall = result["wall_time"]
+        print(f"{target:20} median {wall['median']:8.2f}s  min {wall['min']:8.2f}s  "
+              f"max {wall['max']:8.2f}s  stdev {wall['stdev']:6.2f}s  failures {result['failures']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+def delta_str(base: float, other: float) -> str:
+    delta = other - base
+    percent = f" ({delta / base:+.0%})" if base else ""
+    return f"{base:8.2f}s -> {other:8.2f}s  {delta:+8.2f}s{percent}"
+
+def cmd_compare(args: argparse.Namespace):
+    base = json.loads(args.base.read_text())
+    other = json.loads(args.other.read_text())
+    print(f"comparing {base.get('label') or args.base} -> {other.get('label') or args.other} (medians)")
+    for (target, base_result) in base["targets"].items():
+        other_result = other["targets"].get(target)
+        if other_result is None:
+            continue
+        print(f"{target}: {delta_str(base_result['wall_time']['median'], other_result['wall_time']['median'])}")
+        for (chunk, base_node) in base_result["nodes"].items():
+            other_node = other_result["nodes"].get(chunk)
+            if other_node is None:
+                continue
+            print(f"  {chunk:30} {delta_str(base_node['median'], other_node['median'])}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the examples and record timings")
+    run_parser.add_argument("targets", nargs="*",
+                            help=f"examples ({', '.join(examples)}) or .scy files, default: all examples")
+    run_parser.add_argument("--scy", default=f"{shlex.quote(sys.executable)} -m scy.scy",
+                            help="command used to run scy, to compare different versions")
+    run_parser.add_argument("--args", default="", help="extra arguments passed to scy")
+    run_parser.add_argument("-j", type=int, dest="jobs", default=1, help="jobs passed to scy")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per target")
+    run_parser.add_argument("--label", default="", help="name shown when comparing results")
+    run_parser.add_argument("--json", type=Path, help="write results to this file")
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = subparsers.add_parser("compare", help="compare two recorded results")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("other", type=Path)
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,48 @@
 #!/usr/bin/env python3
 
 import argparse
+import copy
 import os
 from pathlib import Path
+import json
 import shutil
-from scy.scy_config_parser import SCYConfig, SCY_arg_parser
+import sys
+import tempfile
+import time
+from scy.scy_config_parser import SCYConfig, SCY_arg_parser, SCY_merge_arg_parser
+from scy.scy_continuation import design_hash, export_bundle, load_bundle
+from scy.scy_estimate import (
+    compare_jobs,
+    critical_path,
+    default_duration,
+    estimate,
+    load_inputs,
+    node_durations
+)
+from scy.scy_exceptions import SCYTreeError
+from scy.scy_history import RunHistory
+from scy.scy_journal import Journal
 from scy.scy_sby_bridge import SBYBridge, SBYException
+from scy.scy_shard import (
+    bundle_chunk,
+    format_chunk,
+    merge_bundles,
+    select_shard,
+    trace_files,
+    write_bundle
+)
+from scy.scy_stats import node_record, run_totals
 from scy.scy_task_runner import (
     SCYRunnerContext,
     SCYTaskContext,
+    depend_on,
     dump_trace,
-    run_tree
+    run_tree,
+    wait_for_task
 )
 from scy.scy_task_tree import TaskTree
+from scy.scy_timeline import Timeline
+from scy.scy_yosys_pool import YosysPool
 from yosys_mau import source_str
 import yosys_mau.task_loop as tl
 from yosys_mau.task_loop import (
@@ -27,16 +57,27 @@ import yosys_mau.task_loop.job_server as job
 LogContext.app_name = "SCY"
 
 class SCYTask():
-    def __init__(self, args: "argparse.Namespace | None" = None):
+    def __init__(self, args: "argparse.Namespace | None" = None, scycfg: "SCYConfig | None" = None,
+                 log_stdout: bool = True):
         self.args = args
+        self.scycfg = scycfg
+        self.log_stdout = log_stdout
         self.localdir = False
         self.failed_tree = None
+        self.design_hash = None
+        self.start_time = time.monotonic()
+        self.task_steps: "dict[str, int]" = {}
+        self.task_stats: "dict[str, list[dict]]" = {}
+        self.context_task: "tl.Task | None" = None
+        self.timeline: "Timeline | None" = None
 
     def parse_scyfile(self):
-        scy_source = source_str.read_file(self.args.scyfile)
-        scycfg = SCYConfig(scy_source)
+        if self.scycfg is None:
+            scy_source = source_str.read_file(self.args.scyfile)
+            self.scycfg = SCYConfig(scy_source)
+        scycfg = self.scycfg
         scycfg.args = self.args
-        with tl.root_task().as_current_task():
+        with self.context_task.as_current_task():
             SCYRunnerContext.scycfg = scycfg
 
     def display_tree(self):
@@ -44,16 +85,57 @@ class SCYTask():
             if isinstance(seq, TaskTree):
                 print(seq)
 
+    def display_estimate(self):
+        root = TaskTree.make_common(children=SCYRunnerContext.scycfg.sequence)
+        (stats, history) = load_inputs(self.args)
+        (durations, defaulted) = node_durations(root, stats, history)
+        if defaulted:
+            log_warning(f"no recorded time for {defaulted} covers, assuming {default_duration:.0f}s each")
+        jobs = self.args.jobcount or os.cpu_count() or 1
+
+        (length, path) = critical_path(root, durations)
+        log(f"critical path: {length:.0f}s")
+        for task in path[1:]:
+            log(f"  L{task.line:<4} {task.name:20} {durations[task.dir]:8.0f}s")
+        log("jobs  makespan  utilisation")
+        for count in compare_jobs(jobs):
+            result = estimate(root, durations, count)
+            marker = "  (-j)" if count == jobs else ""
+            log(f"  {count:3}  {result['makespan']:7.0f}s  {result['utilisation']:11.0%}{marker}")
+
     def gen_workdir(self):
+        # load history before -f clears the workdir
+        history_path = self.args.history or os.path.join(self.args.workdir, "history.json")
+        history = RunHistory(history_path)
+        with self.context_task.as_current_task():
+            SCYRunnerContext.history = history
+
         try:
             os.makedirs(self.args.workdir)
         except FileExistsError:
-            if self.args.force:
+            if self.args.resume:
+                log(f"resuming run in '{self.args.workdir}'")
+            elif self.args.force:
+                # keep cached witnesses which live in the workdir
+                workdir = Path(self.args.workdir).absolute()
+                witness_dir = history.witness_dir.absolute()
+                kept_witnesses = None
+                if workdir in witness_dir.parents and witness_dir.exists():
+                    kept_witnesses = Path(tempfile.mkdtemp()) / "witness"
+                    shutil.move(witness_dir, kept_witnesses)
                 shutil.rmtree(self.args.workdir, ignore_errors=True)
                 os.makedirs(self.args.workdir)
+                if kept_witnesses:
+                    os.makedirs(witness_dir.parent, exist_ok=True)
+                    shutil.move(kept_witnesses, witness_dir)
+                    os.rmdir(kept_witnesses.parent)
             else:
                 raise RuntimeError(f"directory '{self.args.workdir}' already exists, use -f to overwrite the existing directory.",)
 
+        journal = Journal(os.path.join(self.args.workdir, "journal.jsonl"))
+        with self.context_task.as_current_task():
+            SCYRunnerContext.journal = journal
+
     def prep_sby(self):
         sbycfg = SBYBridge.from_scycfg(SCYRunnerContext.scycfg)
         if self.localdir:
@@ -61,47 +143,176 @@ class SCYTask():
         else:
             scy_path = Path(self.args.scyfile).absolute().parent
             sbycfg.fix_relative_paths(scy_path)
-        with tl.root_task().as_current_task():
+        self.design_hash = design_hash(sbycfg, Path(self.args.workdir))
+        continuation = None
+        if self.args.continue_from:
+            continuation = load_bundle(self.args.continue_from)
+            if continuation["design_hash"] != self.design_hash:
+                log_warning(f"design differs from the one {continuation['chunk']} was exported from")
+        with self.context_task.as_current_task():
             SCYRunnerContext.sbycfg = sbycfg
             SCYRunnerContext.task_steps = {}
+            SCYRunnerContext.task_covers = {}
+            SCYRunnerContext.task_proofs = {}
+            SCYRunnerContext.task_progress = {}
+            SCYRunnerContext.task_variants = {}
+            SCYRunnerContext.dedup = {}
+            SCYRunnerContext.state_merge = {}
+            SCYRunnerContext.task_states = {}
+            SCYRunnerContext.task_started = {}
+            SCYRunnerContext.prepared = {}
+            SCYRunnerContext.task_stats = {}
+            SCYRunnerContext.continuation = continuation
+            if self.args.yosys_workers > 0:
+                common_il = os.path.join('common', 'model', 'design_prep.il')
+                SCYRunnerContext.yosys_pool = YosysPool(self.args.yosys_workers, Path(self.args.workdir), common_il)
+        self.task_steps = SCYRunnerContext.task_steps
+        self.task_stats = SCYRunnerContext.task_stats
+
+        sequence = SCYRunnerContext.scycfg.sequence
+        if self.args.shard:
+            (index, count) = self.args.shard
+            # a copy, since attaching the trees to a root sets their parent and depth
+            (durations, _) = node_durations(TaskTree.make_common(children=copy.deepcopy(sequence)),
+                                            None, SCYRunnerContext.history)
+            sequence = select_shard(sequence, durations, index, count)
+            log(f"running shard {index}/{count} with {len(sequence)} of the top level covers")
 
         # add common sby generation task
-        SCYRunnerContext.scycfg.root = TaskTree.make_common(children=SCYRunnerContext.scycfg.sequence)
+        SCYRunnerContext.scycfg.root = TaskTree.make_common(children=sequence)
+
+    def chunk_status(self, task: TaskTree) -> str:
+        if task.steps:
+            return "PASS"
+        elif task == self.failed_tree:
+            return "FAILED"
+        elif task.status == "UNREACHABLE":
+            return "UNREACHABLE"
+        else:
+            return "ABORTED"
+
+    def node_status(self, task: TaskTree) -> str:
+        # nodes between the chunks are run once the chunk above them has finished
+        if task == self.failed_tree:
+            return "FAILED"
+        parent = task.parent
+        while not parent.is_common and parent.stmt not in ["append", "cover", "cover_any"]:
+            parent = parent.parent
+        return "PASS" if parent.is_common else self.chunk_status(parent)
+
+    def results(self) -> "tuple[list[dict], list[dict]]":
+        # chunk and trace records of the run so far, also usable after it failed
+        chunks: "list[dict]" = []
+        traces: "list[dict]" = []
+        root = getattr(self.scycfg, "root", None)
+        for task in root.traverse() if root is not None else []:
+            if task.stmt == "trace":
+                try:
+                    cycles = task.stop_cycle + 1
+                except TypeError:
+                    cycles = None
+                traces.append({"line": task.line, "name": task.name, "cycles": cycles,
+                               "files": trace_files(Path(self.args.workdir), task.name)})
+            if task.stmt not in ["append", "cover", "cover_any"]:
+                continue
+            task_key = f"{task.linestr}_{task.name}"
+            task.steps = self.task_steps.get(task_key)
+            record = node_record(task, self.task_stats.get(task_key, []), task.steps, self.chunk_status(task))
+            chunks.append(bundle_chunk(task, record))
+        return (chunks, traces)
 
     def display_stats(self):
         trace_tasks: "list[TaskTree]" = []
+        node_records: "list[dict]" = []
+        bundle_chunks: "list[dict]" = []
         log("Chunks:")
         for task in SCYRunnerContext.scycfg.root.traverse():
             if task.stmt == "trace":
                 trace_tasks.append(task)
-            if task.stmt not in ["append", "cover"]:
+            if task.stmt in ["trace", "add", "enable", "disable"]:
+                node_records.append(node_record(task, SCYRunnerContext.task_stats.get(task.dir, []),
+                                                None, self.node_status(task)))
+            if task.stmt not in ["append", "cover", "cover_any"]:
                 continue
-            task.steps = SCYRunnerContext.task_steps.get(f"{task.linestr}_{task.name}")
+            task_key = f"{task.linestr}_{task.name}"
+            task.steps = SCYRunnerContext.task_steps.get(task_key)
+            status = self.chunk_status(task)
             if task.steps:
                 steps_str = f"{task.steps:2}"
                 cycles_str = f"{task.start_cycle:2} .. {task.stop_cycle:2}"
-            elif task == self.failed_tree:
-                steps_str = " 0"
-                cycles_str = "FAILED  "
             else:
                 steps_str = " 0"
-                cycles_str = "ABORTED "
+                cycles_str = {"FAILED": "FAILED  ", "UNREACHABLE": "UNREACH "}.get(status, "ABORTED ")
+            node_records.append(node_record(task, SCYRunnerContext.task_stats.get(task_key, []),
+                                            task.steps, status))
+            bundle_chunks.append(bundle_chunk(task, node_records[-1]))
             chunk_str = " "*task.depth + f"L{task.line}"
             task_str = task.name if task.is_runnable else f"{task.stmt} {task.name}"
+            if task.stmt == "cover_any":
+                task_str = SCYRunnerContext.task_covers.get(task_key, " ".join(task.cover_names))
+                task_str += " (any)"
+            if task_key in SCYRunnerContext.task_proofs:
+                task_str += f"  [proof: {SCYRunnerContext.task_proofs[task_key]}]"
+            if task.alias:
+                task_str += f"  [same as L{task.alias.line}]"
+            if task.merged:
+                task_str += f"  [same state as L{task.merged.line}]"
+            if task_key in SCYRunnerContext.task_variants:
+                task_str += f"  [engine: {SCYRunnerContext.task_variants[task_key]}]"
             log(f"  {chunk_str:6}  {cycles_str}  =>  {steps_str}  {task_str}")
 
+        if self.args.stats_json:
+            stats = {"nodes": node_records,
+                     "totals": run_totals(node_records, time.monotonic() - self.start_time)}
+            with open(self.args.stats_json, "w") as f:
+                json.dump(stats, f, indent=1)
+
+        duplicates = [task for task in SCYRunnerContext.scycfg.root.traverse() if task.alias]
+        if duplicates:
+            log(f"Reused {len(duplicates)} identical chunks from {len(SCYRunnerContext.dedup)} solved chunks")
+        merged = [task for task in SCYRunnerContext.scycfg.root.traverse() if task.merged]
+        if merged:
+            log(f"Reused {len(merged)} chunks starting from an already reached state")
+
         if trace_tasks:
             log("Traces:")
+        bundle_traces: "list[dict]" = []
         for task in trace_tasks:
+            bundle_trace = {"line": task.line, "name": task.name, "cycles": None, "chunks": [],
+                            "files": trace_files(Path(self.args.workdir), task.name)}
+            bundle_traces.append(bundle_trace)
             try:
                 cycles_str = f"{task.stop_cycle + 1} cycles"
                 chunks = task.parent.get_all_linestr()
                 chunks.sort()
                 chunks_str = " ".join(chunks)
                 log(f"  {task.name:12} {cycles_str} [{chunks_str}]")
+                bundle_trace.update({"cycles": task.stop_cycle + 1, "chunks": chunks})
             except TypeError:
                 log(f"  {task.name:12} N/A")
 
+        for line in self.args.export_lines or []:
+            self.export_continuation(line)
+
+        if self.args.shard:
+            write_bundle(Path(self.args.workdir), self.args.shard, bundle_chunks, bundle_traces)
+
+    def export_continuation(self, line: int):
+        for task in SCYRunnerContext.scycfg.root.traverse():
+            if task.line == line and task.stmt in ["append", "cover", "cover_any"]:
+                break
+        else:
+            log_warning(f"no cover or append on line {line} to export")
+            return
+        if not task.steps:
+            log_warning(f"unable to export {task.dir}, it wasn't reached")
+            return
+        workdir = Path(self.args.workdir)
+        outdir = workdir / f"continue_L{line}"
+        export_bundle(task, workdir, outdir, SCYRunnerContext.scycfg.options.trace_ext,
+                      self.design_hash, self.args.scyfile)
+        log(f"exported {task.dir} at cycle {task.stop_cycle} to {outdir}")
+
     def trace_final(self, exc: BaseException):
         # Find last successful task
         while isinstance(exc.__cause__, tl.ChildFailed):
@@ -113,12 +324,19 @@ class SCYTask():
             tl.log_exception(exc, raise_error=True)
 
     async def run(self):
+        # runner context is kept on the task running this file, so several files can share a task loop
+        self.context_task = tl.current_task()
+        if self.args.profile_timeline:
+            self.timeline = Timeline()
+            self.timeline.install(self.context_task)
+            SCYRunnerContext.timeline = self.timeline
         if self.args.workdir is None:
             self.args.workdir = self.args.scyfile.split('.')[0]
             self.localdir = True
 
         # setup logging
-        logging.start_logging()
+        if self.log_stdout:
+            logging.start_logging()
         if self.args.logfile:
             logging.start_logging(self.args.logfile)
         if self.args.log_debug:
@@ -130,21 +348,31 @@ class SCYTask():
         # dump_tree skip
         if self.args.dump_tree:
             display_task = tl.Task(on_run=self.display_tree)
-            display_task.depends_on(parse_task)
+            depend_on(display_task, parse_task)
             display_task[LogContext].scope = "tasks"
             return
 
+        # estimate skip
+        if self.args.estimate is not None:
+            estimate_task = tl.Task(on_run=self.display_estimate)
+            depend_on(estimate_task, parse_task)
+            estimate_task[LogContext].scope = "estimate"
+            return
+
         # generate workdir
         dir_task = tl.Task(on_run=self.gen_workdir)
 
         # prepare sby files
         prep_task = tl.Task(on_run=self.prep_sby)
-        prep_task.depends_on(parse_task)
+        depend_on(prep_task, parse_task)
+        if self.args.shard:
+            # shards are balanced using the run history
+            depend_on(prep_task, dir_task)
 
         # prepare task tree
         tree_task = tl.Task(on_run=run_tree)
-        tree_task.depends_on(prep_task)
-        tree_task.depends_on(dir_task)
+        depend_on(tree_task, prep_task)
+        depend_on(tree_task, dir_task)
         tree_task[SCYTaskContext].task = None
 
         # setupmode skip
@@ -158,6 +386,11 @@ class SCYTask():
         except tl.TaskFailed as exc:
             if not SCYRunnerContext.scycfg.args.trace_final:
                 tl.log_exception(exc)
+        finally:
+            if SCYRunnerContext.history is not None:
+                SCYRunnerContext.history.save()
+            if SCYRunnerContext.yosys_pool is not None:
+                SCYRunnerContext.yosys_pool.close()
 
         # prepare stats task
         display_task = tl.Task(on_run=self.display_stats)
@@ -184,9 +417,114 @@ class SCYTask():
                     break
             # run final trace
             final_trace_task = dump_trace(final_trace, SCYRunnerContext.scycfg.args.workdir)
-            display_task.depends_on(final_trace_task)
+            depend_on(display_task, final_trace_task)
+
+        # covers skipped by the precheck still fail the run
+        unreachable = [task for task in SCYRunnerContext.scycfg.root.traverse()
+                       if task.status == "UNREACHABLE"]
+        if unreachable and tree_task.state != "failed":
+            await display_task.finished
+            log_exception(SCYTreeError(unreachable[0].full_line, "cover statement is unreachable"))
+
+def merge_shards(args: argparse.Namespace):
+    logging.start_logging()
+    LogContext.scope = "merge"
+    try:
+        os.makedirs(args.workdir)
+    except FileExistsError:
+        if not args.force:
+            raise RuntimeError(f"directory '{args.workdir}' already exists, use -f to overwrite the existing directory.",)
+    merged = merge_bundles([Path(bundle) for bundle in args.bundles], Path(args.workdir))
+    if merged["missing"]:
+        log_warning(f"missing shards {', '.join(str(index) for index in merged['missing'])}")
+    log("Chunks:")
+    for chunk in merged["chunks"]:
+        log(format_chunk(chunk))
+    if merged["traces"]:
+        log("Traces:")
+    for trace in merged["traces"]:
+        if trace["cycles"] is None:
+            log(f"  {trace['name']:12} N/A")
+        else:
+            log(f"  {trace['name']:12} {trace['cycles']} cycles [{' '.join(trace['chunks'])}]")
+
+def duplicate_jobnames(scyfiles: "list[str]") -> "list[str]":
+    # workdirs and stats files are named after the jobname
+    jobnames = [Path(scyfile).stem for scyfile in scyfiles]
+    return sorted({jobname for jobname in jobnames if jobnames.count(jobname) > 1})
+
+def batch_args(args: argparse.Namespace, scyfile: str) -> argparse.Namespace:
+    file_args = copy.copy(args)
+    del file_args.scyfiles
+    file_args.scyfile = scyfile
+    jobname = Path(scyfile).stem
+    if args.workdir:
+        file_args.workdir = os.path.join(args.workdir, jobname)
+    if args.stats_json:
+        stats_json = Path(args.stats_json)
+        file_args.stats_json = str(stats_json.with_name(f"{jobname}_{stats_json.name}"))
+    # logging is set up once for the whole batch
+    file_args.logfile = None
+    file_args.log_debug = False
+    file_args.profile_timeline = None
+    return file_args
+
+async def run_batch(args: argparse.Namespace) -> bool:
+    logging.start_logging()
+    if args.logfile:
+        logging.start_logging(args.logfile)
+    if args.log_debug:
+        logging.start_debug_event_logging(args.logfile)
+
+    # files with the same common.sby inputs share a single prep
+    SCYRunnerContext.shared_common = {}
+    errors: "dict[str, BaseException]" = {}
+    file_tasks: "list[tuple[str, SCYTask, tl.Task]]" = []
+    for scyfile in args.scyfiles:
+        scy_task = SCYTask(batch_args(args, scyfile), log_stdout=False)
+        file_task = tl.Task(on_run=scy_task.run)
+        file_task[LogContext].app_name = f"SCY {Path(scyfile).stem}"
+
+        def on_file_error(exc: BaseException, scyfile: str = scyfile):
+            errors[scyfile] = exc
+        file_task.handle_error(handler=on_file_error)
+        file_tasks.append((scyfile, scy_task, file_task))
+
+    for (_, _, file_task) in file_tasks:
+        await wait_for_task(file_task)
+
+    LogContext.scope = "batch"
+    log("Files:")
+    passed = True
+    for (scyfile, scy_task, _) in file_tasks:
+        (chunks, _) = scy_task.results()
+        reached = sum(1 for chunk in chunks if chunk["status"] == "PASS")
+        result_str = "FAILED" if scyfile in errors else "PASS" if reached == len(chunks) else "INCOMPLETE"
+        passed = passed and result_str == "PASS"
+        log(f"  {scyfile:30} {reached:3}/{len(chunks):<3} chunks  {result_str}")
+    return passed
 
 def main():
+    if sys.argv[1:2] == ["merge"]:
+        args = SCY_merge_arg_parser().parse_args(sys.argv[2:])
+        tl.run_task_loop(lambda: merge_shards(args))
+        return
+
+    if sys.argv[1:2] == ["batch"]:
+        parser = SCY_arg_parser(batch=True)
+        args = parser.parse_args(sys.argv[2:])
+        duplicates = duplicate_jobnames(args.scyfiles)
+        if duplicates:
+            parser.error(f"jobnames must be unique, found {', '.join(duplicates)} more than once")
+        job.global_client(args.jobcount)
+        passed = []
+        async def batch():
+            passed.append(await run_batch(args))
+        tl.run_task_loop(batch)
+        if not all(passed):
+            exit(1)
+        return
+
     # read args
     parser = SCY_arg_parser()
     args=parser.parse_args()
@@ -206,6 +544,9 @@ def main():
             log_warning("run with -E to print full stacktrace")
         log_exception(e, raise_error=False)
         exit(1)
+    finally:
+        if scy_task.timeline is not None:
+            scy_task.timeline.write(args.profile_timeline)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,71 @@
+import copy
+from pathlib import Path
+
+from scy.scy import SCYTask
+from scy.scy_config_parser import SCYConfig, SCY_arg_parser
+import yosys_mau.task_loop as tl
+import yosys_mau.task_loop.job_server as job
+
+class SCYResult():
+    def __init__(self, workdir: Path, chunks: "list[dict]", traces: "list[dict]",
+                 error: "Exception | None" = None):
+        self.workdir = workdir
+        self.chunks = chunks
+        self.traces = traces
+        self.error = error
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and all(chunk["status"] == "PASS" for chunk in self.chunks)
+
+    @property
+    def steps(self) -> "dict[int, int | None]":
+        return {chunk["line"]: chunk["steps"] for chunk in self.chunks}
+
+    def chunk(self, line: int) -> "dict | None":
+        return next((chunk for chunk in self.chunks if chunk["line"] == line), None)
+
+    def trace_paths(self, name: str) -> "list[Path]":
+        for trace in self.traces:
+            if trace["name"] == name:
+                return [self.workdir / file for file in trace["files"]]
+        return []
+
+def run_scy(scy: "Path | str | SCYConfig", workdir: "str | Path | None" = None,
+            args: "list[str] | None" = None, jobs: "int | None" = None,
+            base_dir: "str | Path | None" = None, log_stdout: bool = False) -> SCYResult:
+    """Run scy in this process and return the results instead of printing them.
+
+    `scy` is either the Path of a .scy file, the contents of one as a str or an already parsed
+    SCYConfig, which is copied since a run changes its task trees.  Relative paths in the [files]
+    section are taken relative to the .scy file, or to `base_dir` when the contents are given
+    directly.  `args` takes any further command line arguments.
+    """
+    if isinstance(scy, Path):
+        scycfg = None
+        scyfile = str(scy)
+    else:
+        scycfg = copy.deepcopy(scy) if isinstance(scy, SCYConfig) else SCYConfig(scy)
+        if workdir is None:
+            raise ValueError("workdir is required unless the path of a .scy file is given")
+        # only the directory is used, to find the design files
+        scyfile = str(Path(base_dir or ".") / "api.scy")
+
+    cmd_args = list(args or [])
+    if workdir is not None:
+        cmd_args += ["-d", str(workdir)]
+    if jobs is not None:
+        cmd_args += ["-j", str(jobs)]
+    parsed_args = SCY_arg_parser().parse_args(cmd_args + [scyfile])
+    job.global_client(parsed_args.jobcount)
+
+    scy_task = SCYTask(parsed_args, scycfg, log_stdout)
+    error = None
+    try:
+        tl.run_task_loop(scy_task.run)
+    except Exception as e:
+        error = e
+    if scy_task.timeline is not None:
+        scy_task.timeline.write(parsed_args.profile_timeline)
+    (chunks, traces) = scy_task.results()
+    return SCYResult(Path(parsed_args.workdir), chunks, traces, error)
@@ -3,6 +3,7 @@ from scy.scy_task_tree import TaskTree
 from yosys_mau.config_parser import (
     BoolValue,
     ConfigOptions,
+    IntValue,
     ConfigParser,
     Option,
     OptionsSection,
@@ -14,8 +15,17 @@ from yosys_mau.config_parser import (
 from yosys_mau.task_loop import log_warning
 from yosys_mau.source_str import re, source_map
 
-def SCY_arg_parser():
-    parser = argparse.ArgumentParser(prog="scy")
+def shard_spec(value: str) -> "tuple[int, int]":
+    try:
+        (index, count) = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} out of range 1..{count}")
+    return (index, count)
+
+def SCY_arg_parser(batch: bool = False):
+    parser = argparse.ArgumentParser(prog="scy batch" if batch else "scy")
 
     # input arguments
     parser.add_argument("-d", metavar="<dirname>", dest="workdir",
@@ -41,16 +51,77 @@ def SCY_arg_parser():
     parser.add_argument("--tracefinal", action="store_true", dest="trace_final",
             help="always dump complete trace for last successful task, even if an error occurred after")
 
+    parser.add_argument("--progress", action="store_true", dest="progress",
+            help="log solver progress for each step of every cover run")
+
+    parser.add_argument("--history", metavar="<file>", dest="history",
+            help="file to record run history in. default: <dirname>/history.json")
+    parser.add_argument("--autotune", action="store_true", dest="autotune",
+            help="pick engine and depth for each cover from the fastest recorded run")
+    parser.add_argument("--revalidate", action="store_true", dest="revalidate",
+            help="replay recorded witnesses before solving covers again")
+    parser.add_argument("--depthhint", metavar="<margin>", type=int, dest="depth_hint",
+            help="limit depth to <margin> steps past the last recorded steps for each cover")
+
+    parser.add_argument("--yosysworkers", metavar="<N>", type=int, dest="yosys_workers", default=0,
+            help="keep up to <N> yosys processes with the common design loaded to prepare cover inputs")
+
+    parser.add_argument("--estimate", metavar="<file>", nargs="?", const="", dest="estimate",
+            help="estimate the run time from the --stats-json <file> of an earlier run, "
+                 "or from the run history, and exit")
+
+    parser.add_argument("--resume", action="store_true", dest="resume",
+            help="continue an interrupted run in the existing workdir, skipping chunks in its journal")
+
+    parser.add_argument("--export", metavar="<line>", type=int, action="append", dest="export_lines",
+            help="after the run, write a continuation bundle for the cover on <line> to <dirname>/continue_L<line>")
+    parser.add_argument("--continue", metavar="<bundle dir>", dest="continue_from",
+            help="start the top level covers from the end of an exported continuation bundle")
+
+    parser.add_argument("--shard", metavar="<K>/<N>", type=shard_spec, dest="shard",
+            help="split the top level covers into <N> shards and only run shard <K>")
+
+    parser.add_argument("--stats-json", metavar="<file>", dest="stats_json",
+            help="write per chunk run statistics to <file> in JSON format")
+
+    parser.add_argument("--profile-timeline", metavar="<file>", dest="profile_timeline",
+            help="write a timeline of all tasks to <file> in trace event format")
+
     parser.add_argument("--logfile", type=argparse.FileType('w'), dest="logfile",
             help="name of file to log to")
 
-    parser.add_argument('scyfile', metavar="<jobname>.scy",
-            help=".scy file")
+    if batch:
+        parser.add_argument('scyfiles', metavar="<jobname>.scy", nargs="+",
+                help=".scy files, each run in <jobname> or in <dirname>/<jobname> with -d")
+    else:
+        parser.add_argument('scyfile', metavar="<jobname>.scy",
+                help=".scy file")
+    return parser
+
+def SCY_merge_arg_parser():
+    parser = argparse.ArgumentParser(prog="scy merge")
+
+    parser.add_argument("-d", metavar="<dirname>", dest="workdir", default="merged",
+            help="directory to collect the merged results in. default: merged")
+    parser.add_argument("-f", action="store_true", dest="force",
+            help="reuse the directory if it already exists")
+    parser.add_argument("bundles", metavar="<shard dir>", nargs="+",
+            help="workdirs of the shard runs to merge")
     return parser
 
 class SCYOptions(ConfigOptions):
     design_scope = Option(StrValue(), default="")
     replay_vcd = Option(BoolValue(), default=False)
+    precheck = Option(BoolValue(), default=False)
+    unreach_proof = Option(BoolValue(), default=False)
+    unreach_engine = Option(StrValue(), default="abc pdr")
+    step_timeout = Option(IntValue(), default=0)
+    stall_policy = Option(StrValue(), default="warn")
+    node_timeout = Option(IntValue(), default=0)
+    diversify = Option(IntValue(), default=1)
+    dedup = Option(BoolValue(), default=False)
+    state_merge = Option(BoolValue(), default=False)
+    speculative_prep = Option(BoolValue(), default=False)
     sby_options = ""
 
     def validate_options(self):
@@ -83,6 +154,8 @@ class SCYConfig(ConfigParser):
         return tree_list
     design = StrSection(default="")
     engines = StrSection(default="smtbmc boolector\n")
+    fallback_engines = StrSection(default="")
+    engine_variants = StrSection(default="")
     fallback = RawSection(all_sections=True)
 
     def __init__(self, contents: str) -> None:
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from scy.scy_sby_bridge import SBYBridge
+from scy.scy_task_tree import TaskTree
+
+bundle_name = "continuation.json"
+
+def design_hash(sbycfg: SBYBridge, workdir: Path) -> str:
+    # the design script and input files, before scy adds its own cells
+    digest = hashlib.sha1("\n".join(sbycfg.script or []).encode())
+    for line in sbycfg.files or []:
+        if not line.split():
+            continue
+        try:
+            with open(workdir / line.split()[-1], "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(line.encode())
+    return digest.hexdigest()
+
+def cell_states(task: TaskTree) -> "tuple[dict[str, str], list[dict]]":
+    # effective enable cell states and added cells for the children of a task
+    enable_cells = {}
+    add_cells = []
+    for (name, cell) in task.enable_cells.items():
+        if "status" in cell:
+            enable_cells[name] = cell["status"]
+        elif "type" in cell:
+            add_cells.append({"type": cell["type"], "lhs": cell.get("lhs")})
+    if task.has_local_enable_cells:
+        for line in task.body.split("\n"):
+            words = line.split()
+            if len(words) == 2 and words[0] in ["enable", "disable"]:
+                enable_cells[words[1]] = words[0]
+    return (enable_cells, add_cells)
+
+def export_bundle(task: TaskTree, workdir: Path, outdir: Path, trace_ext: str,
+                  hash: str, source: str) -> dict:
+    os.makedirs(outdir, exist_ok=True)
+    task_dir = workdir / task.get_dir()
+    # an append continues from its parent's trace, which is already the last one in its chain
+    prior = task.traces if task.uses_sby else task.traces[:-1]
+    chain = [(task_dir / "src" / trace.split()[0], trace.split()[1:]) for trace in prior]
+    chain.append((task_dir / "engine_0" / f"trace0.{trace_ext}",
+                  [] if task.uses_sby else task.traces[-1].split()[1:]))
+    traces = []
+    for (i, (trace, extra)) in enumerate(chain):
+        name = f"prefix{i}.{trace_ext}"
+        shutil.copyfile(trace, outdir / name)
+        traces.append(" ".join([name] + extra))
+    (enable_cells, add_cells) = cell_states(task)
+    bundle = {
+        "version": 1,
+        "source": source,
+        "chunk": task.dir,
+        "line": task.line,
+        "name": task.name,
+        "cycles": task.stop_cycle,
+        "design_il": os.path.join("common", "model", "design_prep.il"),
+        "design_hash": hash,
+        "traces": traces,
+        "enable_cells": enable_cells,
+        "add_cells": add_cells,
+    }
+    with open(outdir / bundle_name, "w") as f:
+        json.dump(bundle, f, indent=1)
+    return bundle
+
+def load_bundle(path: "Path | str") -> dict:
+    path = Path(path).absolute()
+    with open(path / bundle_name, "r") as f:
+        bundle = json.load(f)
+    bundle["path"] = str(path)
+    return bundle
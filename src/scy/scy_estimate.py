@@ -0,0 +1,90 @@
+import heapq
+import json
+import os
+import statistics
+from collections import deque
+from pathlib import Path
+
+from scy.scy_history import RunHistory
+from scy.scy_task_tree import TaskTree
+
+# assumed wall time in seconds of a cover run without any recorded time
+default_duration = 60.0
+
+def node_durations(root: TaskTree, stats: "dict | None" = None,
+                   history: "RunHistory | None" = None) -> "tuple[dict[str, float], int]":
+    # returns durations by chunk and the number of cover runs using the default
+    recorded: "dict[str, float]" = {}
+    if stats:
+        for node in stats.get("nodes", []):
+            if node.get("wall_time") is not None and node.get("runs"):
+                recorded[node["chunk"]] = node["wall_time"]
+    durations: "dict[str, float]" = {}
+    defaulted = 0
+    for task in root.traverse():
+        if task.is_common or not task.uses_sby:
+            durations[task.dir] = 0.0
+        elif task.dir in recorded:
+            durations[task.dir] = recorded[task.dir]
+        else:
+            passed = [record["wall_time"] for record in (history.records(task) if history else [])
+                      if record["status"] == "PASS"]
+            if passed:
+                durations[task.dir] = statistics.median(passed)
+            else:
+                durations[task.dir] = default_duration
+                defaulted += 1
+    return (durations, defaulted)
+
+def simulate(root: TaskTree, durations: "dict[str, float]", jobs: int) -> "tuple[float, float]":
+    # list scheduling like the task loop: children become ready when their parent finishes and
+    # take the next free job slot in the order they were created
+    ready = deque([root])
+    running: "list[tuple[float, int, TaskTree]]" = []
+    now = 0.0
+    busy = 0.0
+    started = 0
+    while ready or running:
+        while ready and len(running) < jobs:
+            task = ready.popleft()
+            duration = durations.get(task.dir, 0.0)
+            heapq.heappush(running, (now + duration, started, task))
+            started += 1
+            busy += duration
+        (now, _, task) = heapq.heappop(running)
+        ready.extend(task.children)
+    return (now, busy)
+
+def critical_path(root: TaskTree, durations: "dict[str, float]") -> "tuple[float, list[TaskTree]]":
+    best = (durations.get(root.dir, 0.0), [root])
+    for child in root.children:
+        (length, path) = critical_path(child, durations)
+        length += durations.get(root.dir, 0.0)
+        if length > best[0]:
+            best = (length, [root] + path)
+    return best
+
+def estimate(root: TaskTree, durations: "dict[str, float]", jobs: int) -> dict:
+    (makespan, busy) = simulate(root, durations, jobs)
+    return {
+        "jobs": jobs,
+        "makespan": makespan,
+        "utilisation": busy / (jobs * makespan) if makespan else 0.0,
+    }
+
+def compare_jobs(jobs: int) -> "list[int]":
+    counts = {1, max(1, jobs // 2), jobs, jobs * 2}
+    count = 1
+    while count < jobs * 4:
+        counts.add(count)
+        count *= 2
+    return sorted(counts)
+
+def load_inputs(args) -> "tuple[dict | None, RunHistory | None]":
+    stats = None
+    if args.estimate:
+        with open(args.estimate, "r") as f:
+            stats = json.load(f)
+    history_path = args.history or os.path.join(args.workdir, "history.json")
+    history = RunHistory(history_path) if Path(history_path).exists() else None
+    return (stats, history)
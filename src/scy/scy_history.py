@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from scy.scy_task_tree import TaskTree
+
+# records kept per node, oldest are dropped first
+max_records = 20
+
+def node_signature(task: TaskTree) -> str:
+    # a node is only matched if the statements leading up to it are unchanged
+    lines = []
+    node = task
+    while node is not None and not node.is_common:
+        lines.append(f"{node.stmt} {node.name} {node.asgmt or ''}".strip())
+        node = node.parent
+    lines.reverse()
+    return hashlib.sha1("\n".join(lines).encode()).hexdigest()[:16]
+
+class RunHistory():
+    def __init__(self, path: "Path | str"):
+        self.path = Path(path)
+        self.nodes: "dict[str, list[dict]]" = {}
+        try:
+            with open(self.path, "r") as f:
+                self.nodes = json.load(f).get("nodes", {})
+        except FileNotFoundError:
+            pass
+
+    def records(self, task: TaskTree) -> "list[dict]":
+        signature = node_signature(task)
+        return [record for record in self.nodes.get(task.dir, [])
+                if record.get("signature") == signature]
+
+    def record(self, task: TaskTree, engine: str, depth: int, steps: "int | None",
+               wall_time: float, status: str):
+        records = self.nodes.setdefault(task.dir, [])
+        records.append({
+            "signature": node_signature(task),
+            "engine": engine,
+            "depth": depth,
+            "steps": steps,
+            "wall_time": wall_time,
+            "status": status,
+            "time": int(time.time()),
+        })
+        del records[:-max_records]
+
+    def best(self, task: TaskTree) -> "dict | None":
+        passed = [record for record in self.records(task) if record["status"] == "PASS"]
+        if not passed:
+            return None
+        return min(passed, key=lambda record: (record["wall_time"], record["depth"]))
+
+    def last_steps(self, task: TaskTree) -> "int | None":
+        passed = [record for record in self.records(task)
+                  if record["status"] == "PASS" and record["steps"] is not None]
+        return passed[-1]["steps"] if passed else None
+
+    @property
+    def witness_dir(self) -> Path:
+        return self.path.parent / "witness"
+
+    def witness(self, task: TaskTree) -> "Path | None":
+        witness = self.witness_dir / f"{task.dir}_{node_signature(task)}.yw"
+        return witness if witness.exists() else None
+
+    def store_witness(self, task: TaskTree, trace: Path):
+        os.makedirs(self.witness_dir, exist_ok=True)
+        shutil.copyfile(trace, self.witness_dir / f"{task.dir}_{node_signature(task)}.yw")
+
+    def save(self):
+        os.makedirs(self.path.parent, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "nodes": self.nodes}, f, indent=1)
+        os.replace(tmp_path, self.path)
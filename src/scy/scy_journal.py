@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from scy.scy_history import node_signature
+from scy.scy_task_tree import TaskTree
+
+def file_checksum(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class Journal():
+    def __init__(self, path: "Path | str"):
+        self.path = Path(path)
+        self.entries: "dict[str, dict]" = {}
+        self.partial = False
+        try:
+            with open(self.path, "r") as f:
+                contents = f.read()
+        except FileNotFoundError:
+            return
+        # a crash can leave the last entry half written
+        self.partial = bool(contents) and not contents.endswith("\n")
+        for line in contents.splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self.entries[entry["chunk"]] = entry
+
+    def record(self, task: TaskTree, steps: int, witness: Path, workdir: Path, cover: "str | None" = None):
+        entry = {
+            "chunk": task.dir,
+            "signature": node_signature(task),
+            "steps": steps,
+            "cover": cover,
+            "witness": str(witness.relative_to(workdir)),
+            "sha1": file_checksum(witness),
+            "time": int(time.time()),
+        }
+        self.entries[task.dir] = entry
+        with open(self.path, "a") as f:
+            if self.partial:
+                f.write("\n")
+                self.partial = False
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def completed(self, task: TaskTree, workdir: Path) -> "dict | None":
+        entry = self.entries.get(task.dir)
+        if entry is None or entry["signature"] != node_signature(task):
+            return None
+        try:
+            if file_checksum(workdir / entry["witness"]) != entry["sha1"]:
+                return None
+        except OSError:
+            return None
+        return entry
@@ -66,6 +66,21 @@ class SBYBridge():
     def files(self, contents: "str | list[str]"):
         self.add_section("files", contents)
 
+    def get_option(self, name: str) -> "str | None":
+        for line in self.options or []:
+            try:
+                key, value = line.split(maxsplit=1)
+            except ValueError:
+                continue
+            if key == name:
+                return value
+        return None
+
+    def set_option(self, name: str, value: str):
+        options = [line for line in self.options or [] if line.split()[:1] != [name]]
+        options.append(f"{name} {value}")
+        self.options = options
+
     def fix_relative_paths(self, dir_prepend: str):
         if self.data["files"]:
             for i, s in enumerate(self.files):
@@ -148,8 +163,39 @@ class SBYBridge():
         task_loop.LogContext.scope = task_loop.LogContext.scope[0:-4]
         return SBYException(event_cmd, logfile, bestguess, typ)
 
+    def reached_covers(self, logfile: Path) -> "list[tuple[int, str]]":
+        with open(logfile, "r") as f:
+            log = f.read()
+
+        regex = r"reached cover statement (?:(\S+) )?at .*step (\d+)$"
+        reached = re.findall(regex, log, flags=re.MULTILINE)
+        return sorted((int(step), name) for (name, step) in reached)
+
+    def status(self, logfile: Path) -> str:
+        with open(logfile, "r") as f:
+            log = f.read()
+
+        m = re.search(r"DONE \((?P<status>\w+), rc=\d+\)", log)
+        return m["status"] if m else "UNKNOWN"
+
+    def elapsed_time(self, logfile: Path, kind: str = "clock") -> "int | None":
+        with open(logfile, "r") as f:
+            log = f.read()
+
+        m = re.search(rf"Elapsed {kind} time \[H:MM:SS \(secs\)\]: \S+ \((?P<secs>\d+)\)", log)
+        return int(m["secs"]) if m else None
+
     from_scycfg = staticmethod(from_scycfg)
 
+# techmap rule turning cover(A) into assert(!A), so that proving the assert shows the cover can't be
+# reached
+cover_to_assert_map = [
+    "module \\$cover (A, EN);",
+    "\tinput A, EN;",
+    "\t\\$assert _TECHMAP_REPLACE_ (.A(!A), .EN(EN));",
+    "endmodule",
+]
+
 def parse_common_sby(common_task: TaskTree, sbycfg: SBYBridge, scycfg: SCYConfig):
     assert common_task.is_common, "expected tree root to be common.sby generation"
 
@@ -192,12 +238,39 @@ def parse_common_sby(common_task: TaskTree, sbycfg: SBYBridge, scycfg: SCYConfig
 
     return (add_log, add_cells, enable_cells)
 
+def remaining_budget(task: TaskTree, task_steps: "dict[str, int]") -> "int | None":
+    # cycles left of the closest budget annotation, after the steps taken since that statement
+    used = 0
+    node = task
+    while node is not None and not node.is_common:
+        if "budget" in node.annotations:
+            return int(node.annotations["budget"]) - used
+        node = node.parent
+        if node is not None and node.stmt in ["cover", "cover_any", "append"]:
+            used += task_steps.get(f"{node.linestr}_{node.name}", 0)
+    return None
+
 def gen_sby(task: TaskTree, sbycfg: SBYBridge, scycfg: SCYConfig,
             add_cells: "dict[int, dict[str]]",
-            enable_cells: "dict[str, dict[str, str | bool]]"):
+            enable_cells: "dict[str, dict[str, str | bool]]",
+            task_steps: "dict[str, int] | None" = None):
 
     sbycfg = copy.deepcopy(sbycfg)
 
+    timeout = int(task.get_annotation("timeout") or scycfg.options.node_timeout)
+    if timeout > 0:
+        sbycfg.set_option("timeout", str(timeout))
+
+    engine = task.get_annotation("engine")
+    if engine:
+        sbycfg.add_section("engines", engine)
+    depth = task.get_annotation("depth")
+    if depth:
+        sbycfg.set_option("depth", depth)
+    budget = remaining_budget(task, task_steps or {})
+    if budget is not None:
+        sbycfg.set_option("depth", str(min(budget, int(sbycfg.get_option("depth") or 20))))
+
     if not task.is_root and not task.parent.is_common:
         # child nodes depend on parent
         parent = task.parent
@@ -208,6 +281,11 @@ def gen_sby(task: TaskTree, sbycfg: SBYBridge, scycfg: SCYConfig,
                                "src",
                                trace.split()[0]) for trace in task.traces[:-1]]
         sbycfg.files.extend(traces + [f"{parent.tracestr}.{scycfg.options.trace_ext} {parent_trace}"])
+    elif task.traces:
+        # top level covers continuing from an imported prefix
+        prefix_dir = os.path.abspath(scycfg.args.continue_from)
+        sbycfg.files.extend(f"{trace.split()[0]} {os.path.join(prefix_dir, trace.split()[0])}"
+                            for trace in task.traces)
 
     # configure additional cells
     pre_sim_commands = []
@@ -238,12 +316,130 @@ def gen_sby(task: TaskTree, sbycfg: SBYBridge, scycfg: SCYConfig,
         else:
             trace_scope = ""
         traces_script.append(f"sim -w -r {trace}{trace_scope}")
-    if task.stmt == "cover":
-        traces_script.append(f"delete t:$cover c:{task.name} %d")
-        traces_script.append(f"select -assert-count 1 t:$cover")
+    if task.stmt in ["cover", "cover_any"]:
+        covers = [f"c:{name}" for name in task.cover_names]
+        covers += ["%u"] * (len(covers) - 1)
+        traces_script.append(f"delete t:$cover {' '.join(covers)} %d")
+        traces_script.append(f"select -assert-count {len(task.cover_names)} t:$cover")
         sbycfg.script.extend(traces_script)
+        if task.stmt == "cover_any":
+            # reaching any one of the covers is enough
+            sbycfg.set_option("expect", "pass,fail")
     else:
         raise NotImplementedError(task.stmt)
     sbycfg.script.extend(post_sim_commands)
 
     return sbycfg
+
+def gen_precheck_sby(common_task: TaskTree, sbycfg: SBYBridge,
+                     add_cells: "dict[int, dict[str]]",
+                     enable_cells: "dict[str, dict[str, str | bool]]"):
+    assert common_task.is_common, "expected tree root to be common.sby generation"
+
+    sbycfg = copy.deepcopy(sbycfg)
+    depth = int(sbycfg.get_option("depth") or 20)
+
+    # a cover can't be reached by the sequence any later than the sum of depths along its path
+    def max_cycles(task: TaskTree, cycles: int) -> int:
+        if task.cover_names:
+            cycles += int(task.get_annotation("depth") or depth)
+        elif task.stmt == "append":
+            try:
+                cycles += int(task.name)
+            except ValueError:
+                pass
+        return max([cycles] + [max_cycles(child, cycles) for child in task.children])
+
+    covers: "list[str]" = []
+    for task in common_task.traverse():
+        for name in task.cover_names:
+            if name not in covers:
+                covers.append(name)
+
+    # disabling every switchable cell can only make covers easier to reach
+    script = []
+    for cell in add_cells.values():
+        script.append(f"connect -port {cell['cell']} \\EN 1'b0")
+    for (hdlname, cell) in enable_cells.items():
+        if hdlname not in covers:
+            script.append(f"connect -port {hdlname} \\EN {cell['disable']}")
+    selection = [f"c:{name}" for name in covers] + ["%u"] * (len(covers) - 1)
+    script.append(f"delete t:$cover {' '.join(selection)} %d")
+    script.append(f"select -assert-count {len(covers)} t:$cover")
+    sbycfg.script.extend(script)
+
+    sbycfg.set_option("depth", str(max_cycles(common_task, 0)))
+    sbycfg.set_option("expect", "pass,fail")
+    return (sbycfg, covers)
+
+def gen_replay_script(taskcfg: SBYBridge, witness: str) -> "list[str]":
+    # the cover run script with its inputs resolved from the workdir, followed by the witness
+    files = dict(line.split(maxsplit=1) for line in taskcfg.files if line.strip())
+    script = []
+    for line in taskcfg.script:
+        words = line.split()
+        if words[:1] == ["read_rtlil"]:
+            words[-1] = files.get(words[-1], words[-1])
+        elif words[:3] == ["sim", "-w", "-r"]:
+            words[3] = files.get(words[3], words[3])
+        script.append(" ".join(words))
+    script.append(f"sim -r {witness}")
+    return script
+
+def gen_state_script(taskcfg: SBYBridge, witness: str, state_file: str) -> "list[str]":
+    # design with the state at the end of the witness as init values, independent of the selected cover
+    script = [line for line in gen_replay_script(taskcfg, witness)[:-1]
+              if not line.startswith(("delete t:$cover", "select -assert-count"))]
+    script.append(f"sim -w -r {witness}")
+    script.append(f"write_rtlil {state_file}")
+    return script
+
+def gen_prep_script(taskcfg: SBYBridge, prepared_il: str) -> "list[str]":
+    # everything up to the cover selection, except for replaying the last trace
+    script = gen_replay_script(taskcfg, "")[:-1]
+    select = max(i for (i, line) in enumerate(script) if line.startswith("select -assert-count"))
+    last_sim = max(i for (i, line) in enumerate(script) if line.startswith("sim -w -r"))
+    return script[:last_sim] + script[last_sim+1:select+1] + [f"write_rtlil {prepared_il}"]
+
+def uses_prepared_il(taskcfg: SBYBridge) -> bool:
+    return any(line.split()[0] == "prepared.il" for line in taskcfg.files if line.strip())
+
+def use_prepared_il(taskcfg: SBYBridge, prepared_il: str) -> SBYBridge:
+    taskcfg = copy.deepcopy(taskcfg)
+    select = max(i for (i, line) in enumerate(taskcfg.script) if line.startswith("select -assert-count"))
+    last_sim = max(i for (i, line) in enumerate(taskcfg.script) if line.startswith("sim -w -r"))
+    taskcfg.script = (["read_rtlil prepared.il", taskcfg.script[last_sim]] +
+                      taskcfg.script[select+1:])
+    # earlier traces are still copied to src for the children
+    taskcfg.files = ([line for line in taskcfg.files if not line.startswith("common_design.il ")] +
+                     [f"prepared.il {prepared_il}"])
+    return taskcfg
+
+def match_cover(name: str, reached: "list[str]") -> bool:
+    # sby may report covers with their full hierarchical name
+    return any(r == name or r.endswith(f".{name}") for r in reached)
+
+def gen_proof_sby(taskcfg: SBYBridge, scycfg: SCYConfig):
+    proofcfg = copy.deepcopy(taskcfg)
+    proofcfg.set_option("mode", "prove")
+    proofcfg.set_option("expect", "pass,fail")
+    proofcfg.add_section("engines", scycfg.options.unreach_engine)
+    proofcfg.add_section("file cover_to_assert.v", cover_to_assert_map)
+    proofcfg.script.extend(["delete t:$assert",
+                            "techmap -map cover_to_assert.v t:$cover"])
+    return proofcfg
+
+smtbmc_variant_flags = ["--unroll", "--noincr", "--stbv", "--stdt"]
+
+def gen_engine_variants(engines: "list[str]", variants: str, count: int) -> "list[list[str]]":
+    engine_variants = [engines]
+    for line in variants.splitlines():
+        if line.strip():
+            engine_variants.append([line.strip()])
+    # fill up with smtbmc option variants of the base engine
+    base = next((engine.strip() for engine in engines if engine.strip()), "")
+    if base.split()[:1] == ["smtbmc"]:
+        for flag in smtbmc_variant_flags:
+            if flag not in base.split():
+                engine_variants.append([base.replace("smtbmc", f"smtbmc {flag}", 1)])
+    return engine_variants[:count]
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+from scy.scy_task_tree import TaskTree
+
+bundle_name = "shard.json"
+
+def subtree_cost(tree: TaskTree, durations: "dict[str, float]") -> float:
+    return sum(durations.get(task.dir, 0.0) for task in tree.traverse())
+
+def assign_shards(trees: "list[TaskTree]", durations: "dict[str, float]",
+                  count: int) -> "list[list[TaskTree]]":
+    # largest subtrees first, each to the shard with the least work so far
+    shards: "list[list[TaskTree]]" = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for tree in sorted(trees, key=lambda tree: (-subtree_cost(tree, durations), tree.line)):
+        shard = min(range(count), key=lambda i: (loads[i], len(shards[i])))
+        shards[shard].append(tree)
+        loads[shard] += subtree_cost(tree, durations)
+    for shard in shards:
+        shard.sort(key=lambda tree: tree.line)
+    return shards
+
+def select_shard(sequence: "list[TaskTree | str]", durations: "dict[str, float]",
+                 index: int, count: int) -> "list[TaskTree | str]":
+    trees = [tree for tree in sequence if isinstance(tree, TaskTree)]
+    return assign_shards(trees, durations, count)[index - 1]
+
+def bundle_chunk(task: TaskTree, record: dict) -> dict:
+    chunk = dict(record)
+    chunk["depth"] = task.depth
+    chunk["cycles"] = [task.start_cycle, task.stop_cycle] if task.steps else None
+    return chunk
+
+def write_bundle(workdir: Path, shard: "tuple[int, int]", chunks: "list[dict]",
+                 traces: "list[dict]"):
+    with open(workdir / bundle_name, "w") as f:
+        json.dump({"version": 1, "shard": list(shard), "chunks": chunks, "traces": traces}, f, indent=1)
+
+def merge_bundles(bundle_dirs: "list[Path]", outdir: Path) -> dict:
+    chunks: "list[dict]" = []
+    traces: "list[dict]" = []
+    shards: "list[list[int]]" = []
+    for bundle_dir in bundle_dirs:
+        with open(Path(bundle_dir) / bundle_name, "r") as f:
+            bundle = json.load(f)
+        shards.append(bundle["shard"])
+        chunks.extend(bundle["chunks"])
+        for trace in bundle["traces"]:
+            for file in trace["files"]:
+                shutil.copyfile(Path(bundle_dir) / file, outdir / file)
+            traces.append(trace)
+    counts = {count for (_, count) in shards}
+    missing = sorted(set(range(1, max(counts) + 1)) - {index for (index, _) in shards}) if counts else []
+    chunks.sort(key=lambda chunk: chunk["line"])
+    traces.sort(key=lambda trace: trace["line"])
+    merged = {"version": 1, "shards": sorted(shards), "missing": missing,
+              "chunks": chunks, "traces": traces}
+    with open(outdir / bundle_name, "w") as f:
+        json.dump(merged, f, indent=1)
+    return merged
+
+def format_chunk(chunk: dict) -> str:
+    if chunk["cycles"]:
+        cycles_str = f"{chunk['cycles'][0]:2} .. {chunk['cycles'][1]:2}"
+    else:
+        cycles_str = {"FAILED": "FAILED  ", "UNREACHABLE": "UNREACH "}.get(chunk["status"], "ABORTED ")
+    chunk_str = " " * chunk["depth"] + f"L{chunk['line']}"
+    task_str = chunk["name"] if chunk["stmt"] in ["cover", "cover_any"] else f"{chunk['stmt']} {chunk['name']}"
+    return f"  {chunk_str:6}  {cycles_str}  =>  {chunk['steps'] or 0:2}  {task_str}"
+
+def trace_files(workdir: Path, name: str) -> "list[str]":
+    return [file for file in [f"{name}.yw", f"{name}.vcd"] if os.path.exists(workdir / file)]
@@ -0,0 +1,101 @@
+import os
+from pathlib import Path
+
+from scy.scy_task_tree import TaskTree
+
+def proc_children() -> "dict[int, list[int]]":
+    children: "dict[int, list[int]]" = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # the command name may contain spaces, so split after it
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+def find_process(args: "list[str]", parent: int) -> "int | None":
+    # the task loop doesn't expose pids, so look for a process below ours ending in the given arguments
+    children = proc_children()
+    pending = list(children.get(parent, []))
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().split(b"\0")
+        except OSError:
+            continue
+        if [arg.decode(errors="replace") for arg in cmdline[-len(args)-1:-1]] == args:
+            return pid
+        pending.extend(children.get(pid, []))
+    return None
+
+def tree_rss(pid: int) -> int:
+    # resident set size in bytes of a process and all of its descendants
+    children = proc_children()
+    rss = 0
+    pending = [pid]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+        pending.extend(children.get(pid, []))
+    return rss
+
+def dir_size(path: Path) -> int:
+    size = 0
+    for (root, _, files) in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return size
+
+def node_record(task: TaskTree, runs: "list[dict]", steps: "int | None", status: str) -> dict:
+    record = {
+        "line": task.line,
+        "stmt": task.stmt,
+        "name": task.name,
+        "chunk": task.dir,
+        "status": status,
+        "steps": steps,
+        "runs": runs,
+    }
+    if runs:
+        last = runs[-1]
+        record.update({
+            "engine": last.get("engine"),
+            "exit_code": last.get("exit_code"),
+            "exit_type": last.get("exit_type"),
+            "queue_wait": sum(run.get("queue_wait") or 0 for run in runs),
+            "wall_time": sum(run.get("wall_time") or 0 for run in runs),
+            "cpu_time": sum(run.get("cpu_time") or 0 for run in runs),
+            "peak_rss": max(run.get("peak_rss") or 0 for run in runs),
+            "bytes_written": sum(run.get("bytes_written") or 0 for run in runs),
+        })
+    return record
+
+def run_totals(records: "list[dict]", wall_time: float) -> dict:
+    runs = [run for record in records for run in record["runs"]]
+    # traces run yosys instead of a solver
+    sby_runs = [run for record in records if record["stmt"] != "trace" for run in record["runs"]]
+    return {
+        "nodes": len(records),
+        "sby_runs": len(sby_runs),
+        "wall_time": round(wall_time, 3),
+        "solver_wall_time": round(sum(run.get("wall_time") or 0 for run in sby_runs), 3),
+        "cpu_time": sum(run.get("cpu_time") or 0 for run in runs),
+        "peak_rss": max([run.get("peak_rss") or 0 for run in runs] + [0]),
+        "bytes_written": sum(run.get("bytes_written") or 0 for run in runs),
+    }
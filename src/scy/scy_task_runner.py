@@ -1,15 +1,39 @@
+import asyncio
+import copy
+import hashlib
+import io
 import os
 import json
 import re
+import shlex
+import shutil
+import time
 from pathlib import Path
 from typing import cast
 
 from scy.scy_task_tree import TaskTree
 from scy.scy_config_parser import SCYConfig
+from scy.scy_continuation import design_hash
+from scy.scy_history import RunHistory
+from scy.scy_journal import Journal
+from scy.scy_stats import dir_size, find_process, tree_rss
+from scy.scy_timeline import Timeline
+from scy.scy_yosys_pool import YosysPool
 from scy.scy_sby_bridge import (
+    gen_precheck_sby,
+    gen_engine_variants,
+    gen_prep_script,
+    gen_proof_sby,
+    gen_replay_script,
+    gen_state_script,
     gen_sby,
+    match_cover,
     parse_common_sby,
+    remaining_budget,
+    use_prepared_il,
+    uses_prepared_il,
     SBYBridge,
+    SBYException,
 )
 from scy.scy_exceptions import (
     SCYSubProcessException,
@@ -24,6 +48,7 @@ from yosys_mau.task_loop import (
     LogContext,
     log,
     log_exception,
+    log_warning,
 )
 
 def gen_traces(task: TaskTree) -> "list[str]":
@@ -77,9 +102,12 @@ def dump_trace(task: TaskTree, workdir: Path):
         f"read_rtlil {common_il}; sim -hdlname -r {task.name}.yw -vcd {task.name}.vcd"
     ]
     yosys_proc = tl.Process(yosys_args, cwd=workdir)
-    yosys_proc.depends_on(yw_proc)
+    depend_on(yosys_proc, yw_proc)
     yosys_proc.events(tl.process.ExitEvent).handle(on_proc_exit)
     yosys_proc.events(tl.process.StderrEvent).handle(on_proc_err)
+    if SCYRunnerContext.scycfg.args.stats_json:
+        record_stats(task, "yosys-witness", f"{task.name}.yw", yw_proc)
+        record_stats(task, "yosys", f"{task.name}.vcd", yosys_proc)
     return yosys_proc
 
 def on_proc_err(event: tl.process.StderrEvent):
@@ -93,6 +121,14 @@ async def on_proc_exit(event: tl.process.ExitEvent):
 
         # run bridge error handler
         if "sby" in exe_name:
+            if event.returncode == 8 and SCYTaskContext.can_retry:
+                # leave it to the solver task to try the next engine
+                SCYTaskContext.task.status = "TIMEOUT"
+                return
+            if event.returncode == 2 and SCYTaskContext.can_escalate:
+                # leave it to the solver task to rerun with the full depth
+                SCYTaskContext.task.status = "ESCALATE"
+                return
             err = SCYRunnerContext.sbycfg.handle_error(
                 event_task, SCYRunnerContext.scycfg.args.check_error, SCYTaskContext.task
             )
@@ -110,6 +146,28 @@ async def on_proc_exit(event: tl.process.ExitEvent):
             err = SCYSubProcessException(event_cmd, None, bestguess)
         tl.log_exception(err)
 
+async def on_cover_any_exit(event: tl.process.ExitEvent):
+    if event.returncode != 0:
+        return
+    # sby passes as long as the run finished, so check that at least one cover was reached
+    event_task = cast(tl.Process, event.source)
+    task = SCYTaskContext.task
+    logfile = Path(event_task.cwd) / task.dir / "logfile.txt"
+    reached = SCYRunnerContext.sbycfg.reached_covers(logfile)
+    if not reached and SCYTaskContext.can_escalate:
+        task.status = "ESCALATE"
+        return
+    if not reached:
+        event_cmd = " ".join(event_task.command)
+        bestguess = None
+        if SCYRunnerContext.scycfg.args.check_error:
+            bestguess = f"unreached cover statements for {' '.join(task.cover_names)!r}"
+        tl.log_exception(SBYException(event_cmd, logfile, bestguess, "FAIL"))
+    step, name = reached[0]
+    SCYRunnerContext.task_steps[f"{task.linestr}_{task.name}"] = step
+    SCYRunnerContext.task_covers[f"{task.linestr}_{task.name}"] = name or task.name
+    log(f"reached {name or task.name!r} in step {step}")
+
 @tl.task_context
 class SCYRunnerContext:
     sbycfg: SBYBridge
@@ -117,26 +175,118 @@ class SCYRunnerContext:
     add_cells: "dict[int, dict[str]]"
     enable_cells: "dict[str, dict[str, str | bool]]"
     task_steps: "dict[str, int]"
+    task_covers: "dict[str, str]"
+    task_proofs: "dict[str, str]"
+    task_progress: "dict[str, dict[str, float | int | list[float]]]"
+    task_variants: "dict[str, str]"
+    history: "RunHistory | None" = None
+    dedup: "dict[str, tuple[TaskTree, tl.Task | None]]"
+    state_merge: "dict[str, tuple[TaskTree, tl.Task | None]]"
+    prepared: "dict[str, str]"
+    yosys_pool: "YosysPool | None" = None
+    continuation: "dict | None" = None
+    journal: "Journal | None" = None
+    shared_common: "dict[str, tuple[Path, tl.Task]] | None" = None
+    task_stats: "dict[str, list[dict]]"
+    task_states: "dict[str, str]"
+    task_started: "dict[str, float]"
+    timeline: "Timeline | None" = None
 
 @tl.task_context
 class SCYTaskContext:
     task: TaskTree
     recurse: bool
+    can_retry: bool = False
+    can_escalate: bool = False
+
+def update_progress(task_key: str, step: int):
+    now = time.monotonic()
+    progress = SCYRunnerContext.task_progress.setdefault(
+        task_key, {"step": step, "since": now, "step_times": []}
+    )
+    if step == progress["step"]:
+        return
+    step_time = now - progress["since"]
+    progress["step_times"].append(step_time)
+    if SCYRunnerContext.scycfg.args.progress:
+        log(f"step {progress['step']} took {step_time:.1f}s, now at step {step}")
+    progress["step"] = step
+    progress["since"] = now
+
+async def watch_progress(task: TaskTree, sby_task: tl.Process, sby_name: str):
+    step_timeout = SCYRunnerContext.scycfg.options.step_timeout
+    policy = SCYRunnerContext.scycfg.options.stall_policy
+    stalled_step = None
+
+    finished = asyncio.ensure_future(asyncio.shield(sby_task.finished))
+    try:
+        while not finished.done() and sby_task.state != "cancelled":
+            await asyncio.wait([finished], timeout=min(step_timeout, 10))
+            progress = SCYRunnerContext.task_progress.get(sby_name)
+            if finished.done() or progress is None or progress["step"] == stalled_step:
+                continue
+            elapsed = time.monotonic() - progress["since"]
+            if elapsed < step_timeout:
+                continue
+            stalled_step = progress["step"]
+            if policy == "fallback" and SCYTaskContext.can_retry:
+                log_warning(f"step {stalled_step} exceeded step_timeout of {step_timeout}s")
+                task.status = "TIMEOUT"
+                sby_task.cancel()
+            elif policy in ["kill", "fallback"]:
+                sby_task.cancel()
+                event_cmd = " ".join(sby_task.command)
+                logfile = Path(sby_task.cwd) / sby_name / "logfile.txt"
+                bestguess = f"step {stalled_step} exceeded step_timeout of {step_timeout}s"
+                log_exception(SBYException(event_cmd, logfile, bestguess, "TIMEOUT"))
+            else:
+                log_warning(f"step {stalled_step} has been running for {elapsed:.0f}s")
+    finally:
+        if finished.done() and not finished.cancelled():
+            finished.exception()
+        finished.cancel()
+
+def depend_on(task: tl.Task, dependency: tl.Task):
+    task.depends_on(dependency)
+    if SCYRunnerContext.timeline is not None:
+        SCYRunnerContext.timeline.add_dependency(task, dependency)
+
+async def wait_for_task(task: tl.Task):
+    # wait for a task to finish without propagating its failure
+    finished = asyncio.ensure_future(asyncio.shield(task.finished))
+    await asyncio.wait([finished])
+    if not finished.cancelled():
+        finished.exception()
+
+def run_watchdog(task: TaskTree, sby_task: tl.Process, sby_name: str):
+    async def watch_task_progress():
+        await watch_progress(task, sby_task, sby_name)
+    watchdog = tl.Task(on_run=watch_task_progress)
+    watchdog[LogContext].scope = LogContext.scope
+    return watchdog
 
 async def handle_cover_output(lines):
     steps_regex = r"^.*\[(?P<task>.*)\].*(?:reached).*step (?P<step>\d+)$"
+    progress_regex = r"^.*\[(?P<task>.*)\] engine_\d+: ##\s+\S+\s+Checking .* in step (?P<step>\d+)"
     async for line_event in lines:
+        progress_match = re.match(progress_regex, line_event.output)
+        if progress_match:
+            update_progress(progress_match['task'], int(progress_match['step']))
+            continue
         step_match = re.match(steps_regex, line_event.output)
         if step_match:
             task_steps = SCYRunnerContext.task_steps
-            task_steps[step_match['task']] = int(step_match['step'])
+            step = int(step_match['step'])
+            # cover_any runs may reach several covers, children continue from the first
+            if task_steps.get(step_match['task'], step) >= step:
+                task_steps[step_match['task']] = step
 
 def run_children(children: "list[TaskTree]", blocker: "tl.Task"):
     for child in children:
         child_task = tl.Task(on_run=run_task)
         child_task[SCYTaskContext].task = child
         if blocker:
-            child_task.depends_on(blocker)
+            depend_on(child_task, blocker)
 
 def load_design():
     workdir = Path(SCYRunnerContext.scycfg.args.workdir)
@@ -148,6 +298,29 @@ def load_design():
                                         "try setting the 'design_scope' option")
     SCYRunnerContext.scycfg.options.design_scope = design["modules"][0]["name"]
 
+def common_key(sbycfg: SBYBridge, workdir: Path) -> str:
+    # everything the common prep reads, input files by content since their paths depend on the workdir
+    digest = hashlib.sha1(design_hash(sbycfg, workdir).encode())
+    for (name, body) in sbycfg.data.items():
+        if name not in ["files", "engines"]:
+            digest.update("\n".join([f"[{name}]"] + body).encode())
+    return digest.hexdigest()
+
+def link_common(shared_dir: Path, shared_task: tl.Task) -> tl.Task:
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+
+    def link():
+        common_dir = workdir / "common"
+        if common_dir.is_symlink():
+            common_dir.unlink()
+        else:
+            shutil.rmtree(common_dir, ignore_errors=True)
+        os.symlink((shared_dir / "common").absolute(), common_dir)
+
+    link_task = tl.Task(on_run=link)
+    depend_on(link_task, shared_task)
+    return link_task
+
 def run_tree():
     # loading context
     LogContext.scope = "common"
@@ -159,6 +332,11 @@ def run_tree():
         (add_log, add_cells, enable_cells) = parse_common_sby(common_task, sbycfg, scycfg)
     except NotImplementedError as e:
         log_exception(e)
+    if scycfg.options.state_merge and scycfg.options.replay_vcd:
+        log_exception(SCYTreeError(common_task.full_line, "replay_vcd option incompatible with state_merge option"))
+    if scycfg.options.stall_policy not in ["warn", "kill", "fallback"]:
+        log_exception(SCYValueError(scycfg.options.stall_policy,
+                                    "stall_policy must be one of 'warn', 'kill' or 'fallback'"))
 
     # use sby to prepare input
     log(f"preparing input files")
@@ -170,15 +348,27 @@ def run_tree():
     if scycfg.args.dump_common:
         return
 
-    sby_args = ["sby", "common.sby"]
-    root_task = tl.Process(sby_args, cwd=workdir)
-    root_task.events(tl.process.ExitEvent).handle(on_proc_exit)
-    root_task.events(tl.process.StderrEvent).handle(on_proc_err)
+    shared_common = SCYRunnerContext.shared_common
+    key = common_key(sbycfg, workdir) if shared_common is not None else None
+    if key in (shared_common or {}):
+        (shared_dir, shared_task) = shared_common[key]
+        log(f"using input files prepared in {shared_dir}")
+        root_task = link_common(shared_dir, shared_task)
+    else:
+        sby_args = ["sby", "common.sby"]
+        if scycfg.args.resume:
+            # the common design is prepared again on top of the interrupted run
+            sby_args.insert(1, "-f")
+        root_task = tl.Process(sby_args, cwd=workdir)
+        root_task.events(tl.process.ExitEvent).handle(on_proc_exit)
+        root_task.events(tl.process.StderrEvent).handle(on_proc_err)
+        if key:
+            shared_common[key] = (workdir, root_task)
 
     if scycfg.options.replay_vcd and not scycfg.options.design_scope:
         # load top level design name back from generated model
         design_task = tl.Task(on_run=load_design)
-        design_task.depends_on(root_task)
+        depend_on(design_task, root_task)
         root_task = design_task
 
     def parse_add_log():
@@ -207,13 +397,32 @@ def run_tree():
                 task_cell["status"] = "disable"
                 common_task.add_enable_cell(name, task_cell)
 
+        if continuation:
+            apply_continuation_cells(common_task, continuation, enable_cells)
         common_task.update_children_enable_cells(recurse=False)
 
+    continuation = SCYRunnerContext.continuation
+    if continuation:
+        log(f"continuing from {continuation['chunk']} at cycle {continuation['cycles']}")
+        common_task.steps = continuation["cycles"]
+        for child in common_task.children:
+            child.traces = list(continuation["traces"])
+        if continuation["add_cells"]:
+            log_warning(f"cells added before {continuation['chunk']} are not carried over")
+        if not add_log:
+            apply_continuation_cells(common_task, continuation, enable_cells)
+
     if add_log:
         parse_adds_task = tl.Task(on_run=parse_add_log)
-        parse_adds_task.depends_on(root_task)
+        depend_on(parse_adds_task, root_task)
         root_task = parse_adds_task
 
+    if scycfg.options.precheck:
+        precheck_task = tl.Task(on_run=run_precheck)
+        depend_on(precheck_task, root_task)
+        precheck_task[SCYTaskContext].task = common_task
+        root_task = precheck_task
+
     # modify config for full sby runs
     common_il = os.path.join('common', 'model', 'design_prep.il')
     sbycfg.prep_shared(common_il)
@@ -223,6 +432,586 @@ def run_tree():
     SCYTaskContext.recurse = True
     run_children(common_task.children, root_task)
 
+def apply_continuation_cells(common_task: TaskTree, continuation: dict,
+                             enable_cells: "dict[str, dict[str, str | bool]]"):
+    for (name, status) in continuation["enable_cells"].items():
+        if name not in enable_cells:
+            log_warning(f"cell {name!r} was {status}d in {continuation['chunk']} but isn't used in this sequence")
+            continue
+        task_cell = enable_cells[name].copy()
+        task_cell["status"] = status
+        common_task.add_or_update_enable_cell(name, task_cell)
+
+def run_precheck():
+    # loading context
+    LogContext.scope = "precheck"
+    scycfg = SCYRunnerContext.scycfg
+    common_task = scycfg.root
+    workdir = Path(scycfg.args.workdir)
+
+    (precheckcfg, covers) = gen_precheck_sby(common_task, SCYRunnerContext.sbycfg,
+                                             SCYRunnerContext.add_cells,
+                                             SCYRunnerContext.enable_cells)
+    task_sby = workdir / "precheck.sby"
+    log(f"generating {task_sby} for {len(covers)} covers")
+    with open(task_sby, 'w') as sbyfile:
+        precheckcfg.dump(sbyfile)
+
+    if scycfg.args.setupmode:
+        return
+
+    async def on_precheck_exit(event: tl.process.ExitEvent):
+        if event.returncode != 0:
+            return
+        reached = SCYRunnerContext.sbycfg.reached_covers(workdir / "precheck" / "logfile.txt")
+        if not all(name for (_, name) in reached):
+            log_warning("unable to identify reached covers, skipping precheck")
+            return
+        reached_names = [name for (_, name) in reached]
+        unreachable = [name for name in covers if not match_cover(name, reached_names)]
+        for task in common_task.traverse():
+            if task.cover_names and all(name in unreachable for name in task.cover_names):
+                task.status = "UNREACHABLE"
+                log_warning(f"{task.full_line.strip(' :')!r} on line {task.line} "
+                            f"is not reachable within {precheckcfg.get_option('depth')} steps of reset")
+
+    sby_args = ["sby", "-f", "precheck.sby"]
+    precheck_proc = tl.Process(sby_args, cwd=workdir)
+    precheck_proc.events(tl.process.ExitEvent).handle(on_proc_exit)
+    precheck_proc.events(tl.process.ExitEvent).handle(on_precheck_exit)
+
+def record_history(task: TaskTree, taskcfg: SBYBridge, sby_name: str):
+    started = time.monotonic()
+
+    async def on_history_exit(event: tl.process.ExitEvent):
+        if event.returncode < 0:
+            # cancelled
+            return
+        logfile = Path(SCYRunnerContext.scycfg.args.workdir) / sby_name / "logfile.txt"
+        try:
+            reached = SCYRunnerContext.sbycfg.reached_covers(logfile)
+            wall_time = SCYRunnerContext.sbycfg.elapsed_time(logfile)
+        except FileNotFoundError:
+            reached, wall_time = [], None
+        if wall_time is None:
+            wall_time = round(time.monotonic() - started, 1)
+        status = {0: "PASS", 2: "FAIL", 8: "TIMEOUT"}.get(event.returncode, "ERROR")
+        engine = next((engine.strip() for engine in taskcfg.data.get("engines", []) if engine.strip()), "")
+        SCYRunnerContext.history.record(task, engine, int(taskcfg.get_option("depth") or 20),
+                                        reached[0][0] if reached else None, wall_time, status)
+    return on_history_exit
+
+def record_stats(task: TaskTree, engine: str, run_name: str, proc: tl.Process):
+    # run_name is the sby directory, or the output file of any other process
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+    run = {"chunk": run_name, "engine": engine, "queue_wait": None, "wall_time": None,
+           "cpu_time": None, "peak_rss": None, "exit_code": None, "exit_type": None,
+           "bytes_written": None}
+    SCYRunnerContext.task_stats.setdefault(f"{task.linestr}_{task.name}", []).append(run)
+    timing = {"created": time.monotonic()}
+
+    async def sample_rss():
+        pid = None
+        while "exited" not in timing and proc.state not in ["done", "failed", "cancelled"]:
+            if pid is None:
+                pid = find_process(proc.command[1:], os.getpid())
+            if pid is not None:
+                run["peak_rss"] = max(run["peak_rss"] or 0, tree_rss(pid))
+            await asyncio.sleep(0.5)
+
+    async def on_stats_output(event: tl.process.OutputEvent):
+        if "started" in timing:
+            return
+        timing["started"] = time.monotonic()
+        run["queue_wait"] = round(timing["started"] - timing["created"], 3)
+        if os.path.isdir("/proc"):
+            sampler = tl.Task(on_run=sample_rss)
+            sampler[LogContext].scope = LogContext.scope
+
+    async def on_stats_exit(event: tl.process.ExitEvent):
+        timing["exited"] = time.monotonic()
+        run["wall_time"] = round(timing["exited"] - timing.get("started", timing["created"]), 3)
+        run["exit_code"] = event.returncode
+        output = workdir / run_name
+        if not output.is_dir():
+            run["exit_type"] = "PASS" if event.returncode == 0 else "ERROR"
+            run["bytes_written"] = output.stat().st_size if output.exists() else 0
+            return
+        logfile = output / "logfile.txt"
+        try:
+            run["exit_type"] = SCYRunnerContext.sbycfg.status(logfile)
+            run["cpu_time"] = SCYRunnerContext.sbycfg.elapsed_time(logfile, "process")
+        except FileNotFoundError:
+            pass
+        run["bytes_written"] = dir_size(output)
+
+    proc.events(tl.process.OutputEvent).handle(on_stats_output)
+    proc.events(tl.process.ExitEvent).handle(on_stats_exit)
+
+def apply_history(task: TaskTree, taskcfg: SBYBridge) -> "int | None":
+    # explicit annotations take priority over tuning, the tuned depth is returned for the solver
+    # to try first, keeping the configured depth to escalate to
+    best = SCYRunnerContext.history.best(task)
+    if best is None:
+        return None
+    if not task.get_annotation("engine"):
+        taskcfg.add_section("engines", best["engine"])
+    depth = None
+    if not task.get_annotation("depth") and remaining_budget(task, SCYRunnerContext.task_steps) is None:
+        depth = int(best["depth"])
+    log(f"autotune: using engine {best['engine']!r} with depth {depth or taskcfg.get_option('depth')}")
+    return depth
+
+def start_sby(task: TaskTree, taskcfg: SBYBridge, sby_name: str = None,
+              on_exit=on_proc_exit) -> tl.Process:
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+    sby_name = sby_name or task.dir
+    sby_args = ["sby", "-f", f"{sby_name}.sby"]
+    sby_task = tl.Process(sby_args, cwd=workdir)
+    SCYRunnerContext.task_started.pop(sby_name, None)
+
+    def on_started(event: tl.process.OutputEvent):
+        # wall clock, to compare against the mtime of files written by sby
+        SCYRunnerContext.task_started.setdefault(sby_name, time.time())
+
+    sby_task.events(tl.process.OutputEvent).handle(on_started)
+    if SCYRunnerContext.history is not None:
+        sby_task.events(tl.process.ExitEvent).handle(record_history(task, taskcfg, sby_name))
+    if SCYRunnerContext.scycfg.args.stats_json:
+        engine = next((engine.strip() for engine in taskcfg.data.get("engines", []) if engine.strip()), "")
+        record_stats(task, engine, sby_name, sby_task)
+    sby_task.events(tl.process.ExitEvent).handle(on_exit)
+    sby_task.events(tl.process.OutputEvent).process(handle_cover_output)
+    if task.stmt == "cover_any":
+        sby_task.events(tl.process.ExitEvent).handle(on_cover_any_exit)
+    if SCYRunnerContext.scycfg.options.step_timeout > 0:
+        run_watchdog(task, sby_task, sby_name)
+    return sby_task
+
+async def run_variants(task: TaskTree, taskcfg: SBYBridge, count: int):
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+    task_key = f"{task.linestr}_{task.name}"
+    variants = gen_engine_variants(taskcfg.data.get("engines", []),
+                                   SCYRunnerContext.scycfg.engine_variants, count)
+    if len(variants) < count:
+        log_warning(f"only {len(variants)} engine variants available")
+    sby_tasks: "list[tl.Process]" = []
+    winner: "dict[str, str]" = {}
+    failed: "list[str]" = []
+
+    def on_variant_exit(sby_name: str, variantcfg: SBYBridge):
+        async def handler(event: tl.process.ExitEvent):
+            if winner:
+                return
+            if event.returncode != 0:
+                # the cover only fails once no variant is left to reach it
+                failed.append(sby_name)
+                if len(failed) == len(sby_tasks):
+                    await on_proc_exit(event)
+                return
+            winner["name"] = sby_name
+            for sby_task in sby_tasks:
+                if sby_task is not event.source:
+                    sby_task.cancel()
+            # move the winning run into place for the children
+            shutil.rmtree(workdir / task.dir, ignore_errors=True)
+            os.rename(workdir / sby_name, workdir / task.dir)
+            with open(workdir / f"{task.dir}.sby", 'w') as sbyfile:
+                variantcfg.dump(sbyfile)
+            if sby_name in SCYRunnerContext.task_steps:
+                SCYRunnerContext.task_steps[task_key] = SCYRunnerContext.task_steps.pop(sby_name)
+            SCYRunnerContext.task_variants[task_key] = " ".join(variantcfg.data["engines"]).strip()
+            log(f"variant {sby_name!r} finished first")
+        return handler
+
+    for (i, engines) in enumerate(variants):
+        sby_name = f"{task.dir}_v{i}"
+        variantcfg = copy.deepcopy(taskcfg)
+        variantcfg.add_section("engines", engines)
+        with open(workdir / f"{sby_name}.sby", 'w') as sbyfile:
+            variantcfg.dump(sbyfile)
+        sby_tasks.append(start_sby(task, variantcfg, sby_name, on_variant_exit(sby_name, variantcfg)))
+
+    for sby_task in sby_tasks:
+        await wait_for_task(sby_task)
+    if winner:
+        task.status = None
+
+def depth_hint(task: TaskTree, taskcfg: SBYBridge) -> "int | None":
+    margin = SCYRunnerContext.scycfg.args.depth_hint
+    if margin is None or SCYRunnerContext.history is None or task.get_annotation("depth"):
+        return None
+    steps = SCYRunnerContext.history.last_steps(task)
+    if steps is None:
+        return None
+    hint = steps + max(margin, 1)
+    if hint >= int(taskcfg.get_option("depth") or 20):
+        return None
+    return hint
+
+def reuse_witness(task: TaskTree, taskcfg: SBYBridge, witness: Path):
+    # lay out the chunk directory as if sby had found the witness
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+    task_dir = workdir / task.dir
+    shutil.rmtree(task_dir, ignore_errors=True)
+    os.makedirs(task_dir / "engine_0")
+    os.makedirs(task_dir / "src")
+    shutil.copyfile(witness, task_dir / "engine_0" / "trace0.yw")
+    for line in taskcfg.files:
+        (name, src) = line.split(maxsplit=1)
+        if name.endswith(".yw"):
+            shutil.copyfile(workdir / src, task_dir / "src" / name)
+
+async def run_yosys(script: "list[str]") -> "tuple[int, list[str]]":
+    # run a yosys script in the workdir, on a warm worker if there are any
+    if SCYRunnerContext.yosys_pool is not None:
+        result: "list[tuple[int, list[str]]]" = []
+        async def run_pool_job():
+            result.append(await SCYRunnerContext.yosys_pool.run(script))
+        # a pool job counts against -j like any other yosys process
+        pool_task = tl.Task(on_run=run_pool_job)
+        pool_task.use_lease = True
+        pool_task[LogContext].scope = LogContext.scope
+        await wait_for_task(pool_task)
+        return result[0] if result else (1, [])
+    output: "list[str]" = []
+    async def collect_output(lines):
+        async for line_event in lines:
+            output.append(line_event.output)
+    yosys_task = tl.Process(["yosys", "-p", "; ".join(script)],
+                            cwd=Path(SCYRunnerContext.scycfg.args.workdir))
+    yosys_task.events(tl.process.OutputEvent).process(collect_output)
+    await wait_for_task(yosys_task)
+    return (yosys_task.returncode, output)
+
+async def revalidate(task: TaskTree, taskcfg: SBYBridge) -> bool:
+    task_key = f"{task.linestr}_{task.name}"
+    history = SCYRunnerContext.history
+    witness = history.witness(task)
+    steps = history.last_steps(task)
+    if witness is None or steps is None or SCYRunnerContext.scycfg.options.replay_vcd:
+        return False
+
+    # replay the cached witness on top of the current design
+    script = gen_replay_script(taskcfg, str(witness.absolute()))
+    (returncode, output) = await run_yosys(script)
+    reached: "list[str]" = []
+    for line in output:
+        m = re.search(r"Cover (?P<name>\S+?)(?: \(.*\))? reached", line)
+        if m:
+            reached.append(m["name"].lstrip("\\"))
+
+    covers = [name for name in task.cover_names if match_cover(name, reached)]
+    if returncode != 0 or not covers:
+        log("cached witness no longer reaches cover, solving again")
+        return False
+
+    reuse_witness(task, taskcfg, witness)
+    SCYRunnerContext.task_steps[task_key] = steps
+    if task.stmt == "cover_any":
+        SCYRunnerContext.task_covers[task_key] = covers[0]
+    log(f"revalidated cached witness, reached {covers[0]!r} in step {steps}")
+    return True
+
+def resume_from_journal(task: TaskTree) -> bool:
+    # the chunk directory is still in place from the interrupted run
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+    task_key = f"{task.linestr}_{task.name}"
+    entry = SCYRunnerContext.journal.completed(task, workdir)
+    if entry is None:
+        return False
+    SCYRunnerContext.task_steps[task_key] = entry["steps"]
+    if entry["cover"]:
+        SCYRunnerContext.task_covers[task_key] = entry["cover"]
+    log(f"resumed from journal, reached in step {entry['steps']}")
+    return True
+
+def run_solver(task: TaskTree, taskcfg: SBYBridge, tuned_depth: "int | None" = None) -> tl.Task:
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+    task_key = f"{task.linestr}_{task.name}"
+    engine_chain = [taskcfg.data.get("engines", [])]
+    for engine in SCYRunnerContext.scycfg.fallback_engines.splitlines():
+        if engine.strip():
+            engine_chain.append([engine.strip()])
+    diversify = int(task.get_annotation("diversify") or SCYRunnerContext.scycfg.options.diversify)
+    full_depth = taskcfg.get_option("depth")
+    hint = depth_hint(task, taskcfg)
+    if hint is None and tuned_depth is not None and tuned_depth < int(full_depth or 20):
+        hint = tuned_depth
+
+    async def solve():
+        nonlocal hint, taskcfg
+        if SCYRunnerContext.scycfg.args.resume and resume_from_journal(task):
+            return
+        if SCYRunnerContext.scycfg.args.revalidate and SCYRunnerContext.history is not None:
+            if await revalidate(task, taskcfg):
+                return
+        if (SCYRunnerContext.yosys_pool is not None and not uses_prepared_il(taskcfg)
+                and any(line.startswith("sim -w -r") for line in taskcfg.script)):
+            # replay the earlier traces on a warm worker, sby only replays the parent trace
+            prepared_il = f"{task.dir}_prep.il"
+            (returncode, _) = await run_yosys(prep_script(task, taskcfg, prepared_il))
+            if returncode == 0:
+                taskcfg = use_prepared_il(taskcfg, prepared_il)
+        for (i, engines) in enumerate(engine_chain):
+            if i > 0:
+                # reuse the generated inputs, only swapping the engine
+                log_warning(f"timed out, retrying with engine {engines[0]!r}")
+                taskcfg.add_section("engines", engines)
+            while True:
+                if hint is not None:
+                    taskcfg.set_option("depth", str(hint))
+                    log(f"using depth hint of {hint} from previous run")
+                elif full_depth is not None:
+                    taskcfg.set_option("depth", full_depth)
+                with open(workdir / f"{task.dir}.sby", 'w') as sbyfile:
+                    taskcfg.dump(sbyfile)
+                SCYTaskContext.can_retry = i + 1 < len(engine_chain)
+                SCYTaskContext.can_escalate = hint is not None
+                SCYRunnerContext.task_progress.pop(task_key, None)
+                task.status = None
+                if diversify > 1:
+                    await run_variants(task, taskcfg, diversify)
+                else:
+                    await wait_for_task(start_sby(task, copy.deepcopy(taskcfg)))
+                if task.status != "ESCALATE":
+                    break
+                log_warning(f"not reached within depth hint of {hint}, escalating to full depth")
+                hint = None
+            if task.status != "TIMEOUT":
+                break
+
+        trace = workdir / task.dir / "engine_0" / "trace0.yw"
+        if SCYRunnerContext.history is not None and task.status is None and trace.exists():
+            SCYRunnerContext.history.store_witness(task, trace)
+        steps = SCYRunnerContext.task_steps.get(task_key)
+        if SCYRunnerContext.journal is not None and task.status is None and trace.exists() and steps:
+            SCYRunnerContext.journal.record(task, steps, trace, workdir,
+                                            SCYRunnerContext.task_covers.get(task_key))
+
+    solve_task = tl.Task(on_run=solve)
+    solve_task[LogContext].scope = LogContext.scope
+    return solve_task
+
+def prep_script(task: TaskTree, taskcfg: SBYBridge, prepared_il: str) -> "list[str]":
+    # sby -f of the parent restages its src/ directory while a prep may run, so ancestor traces are
+    # read from the runs that wrote them
+    trace_ext = SCYRunnerContext.scycfg.options.trace_ext
+    sources: "dict[str, str]" = {}
+    ancestor = task.parent
+    while ancestor is not None and not ancestor.is_common:
+        if ancestor.uses_sby:
+            sources[f"{ancestor.tracestr}.{trace_ext}"] = os.path.join(ancestor.get_dir(), "engine_0",
+                                                                       f"trace0.{trace_ext}")
+        ancestor = ancestor.parent
+    prepcfg = copy.deepcopy(taskcfg)
+    prepcfg.files = []
+    for line in taskcfg.files:
+        name = line.split()[0] if line.strip() else None
+        prepcfg.files.append(f"{name} {sources[name]}" if name in sources else line)
+    return gen_prep_script(prepcfg, prepared_il)
+
+def run_child_prep(task: TaskTree) -> tl.Task:
+    # prepare everything but the parent trace while the parent is still solving
+    task_key = f"{task.linestr}_{task.name}"
+    prepared_il = f"{task.dir}_prep.il"
+    taskcfg = gen_sby(task, SCYRunnerContext.sbycfg, SCYRunnerContext.scycfg,
+                      SCYRunnerContext.add_cells, SCYRunnerContext.enable_cells,
+                      SCYRunnerContext.task_steps)
+    script = prep_script(task, taskcfg, prepared_il)
+
+    async def prepare():
+        (returncode, _) = await run_yosys(script)
+        if returncode == 0:
+            SCYRunnerContext.prepared[task_key] = prepared_il
+
+    prep_task = tl.Task(on_run=prepare)
+    prep_task[LogContext].scope = LogContext.scope
+    return prep_task
+
+def starts_early(task: TaskTree) -> bool:
+    # variants are only moved into place once sby exits, and vcd traces can't be checked for completeness
+    diversify = int(task.get_annotation("diversify") or SCYRunnerContext.scycfg.options.diversify)
+    return diversify <= 1 and not SCYRunnerContext.scycfg.options.replay_vcd
+
+def witness_complete(trace: Path, since: "float | None" = None) -> bool:
+    # a witness older than the sby run is left over from a previous run
+    try:
+        if since is not None and trace.stat().st_mtime < since:
+            return False
+        with open(trace, "r") as f:
+            json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+    return True
+
+def witness_steps(trace: Path) -> int:
+    # the witness holds the initial state plus one entry for each step
+    with open(trace, "r") as f:
+        return len(json.load(f)["steps"]) - 1
+
+def run_witness_wait(task: TaskTree, solve_task: tl.Task) -> tl.Task:
+    # release children as soon as the witness is written, sby teardown continues in parallel
+    trace = Path(SCYRunnerContext.scycfg.args.workdir) / task.dir / "engine_0" / "trace0.yw"
+
+    async def wait_witness():
+        finished = asyncio.ensure_future(asyncio.shield(solve_task.finished))
+        try:
+            while not finished.done():
+                started = SCYRunnerContext.task_started.get(task.dir)
+                if started is not None and witness_complete(trace, started):
+                    # sby only reports the steps when it exits, children and followers need them now
+                    SCYRunnerContext.task_steps.setdefault(f"{task.linestr}_{task.name}",
+                                                           witness_steps(trace))
+                    log("witness written, starting children")
+                    return
+                await asyncio.wait([finished], timeout=0.5)
+            finished.result()
+        finally:
+            finished.cancel()
+
+    witness_task = tl.Task(on_run=wait_witness)
+    witness_task[LogContext].scope = LogContext.scope
+    return witness_task
+
+def merge_key(task: TaskTree, taskcfg: SBYBridge) -> "str | None":
+    # the same cover from the same reached state and enable context is the same problem
+    if task.is_root or task.parent.is_common or not task.parent.uses_sby:
+        return None
+    parent_state = SCYRunnerContext.task_states.get(f"{task.parent.linestr}_{task.parent.name}")
+    if parent_state is None:
+        return None
+    key = [parent_state]
+    key += [f"[{name}]" for name in taskcfg.data.keys()]
+    key += [line for line in taskcfg.script if not line.startswith("sim -w -r")]
+    key += [line for line in taskcfg.files if not line.split()[0].endswith(".yw")]
+    key += taskcfg.options + taskcfg.data.get("engines", [])
+    return hashlib.sha1("\n".join(key).encode()).hexdigest()
+
+def run_state_hash(task: TaskTree, taskcfg: SBYBridge, solve_task: tl.Task) -> tl.Task:
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+    task_key = f"{task.linestr}_{task.name}"
+    state_il = f"{task.dir}_state.il"
+
+    async def hash_state():
+        await solve_task.finished
+        witness = os.path.join(task.dir, "engine_0", "trace0.yw")
+        script = gen_state_script(taskcfg, witness, state_il)
+        (returncode, _) = await run_yosys(script)
+        if returncode != 0:
+            log_warning("unable to hash reached state, children won't be merged")
+            return
+        with open(workdir / state_il, "rb") as f:
+            SCYRunnerContext.task_states[task_key] = hashlib.sha1(f.read()).hexdigest()
+        os.remove(workdir / state_il)
+
+    state_task = tl.Task(on_run=hash_state)
+    state_task[LogContext].scope = LogContext.scope
+    return state_task
+
+def run_merged(task: TaskTree, taskcfg: SBYBridge, solve_task: "tl.Task | None") -> tl.Task:
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+
+    async def merge():
+        if solve_task is not None:
+            await solve_task.finished
+        task_key = f"{task.linestr}_{task.name}"
+        merged_key = f"{task.merged.linestr}_{task.merged.name}"
+        reuse_witness(task, taskcfg, workdir / task.merged.dir / "engine_0" / "trace0.yw")
+        for results in [SCYRunnerContext.task_steps, SCYRunnerContext.task_covers,
+                        SCYRunnerContext.task_states]:
+            if merged_key in results:
+                results[task_key] = results[merged_key]
+
+    merge_task = tl.Task(on_run=merge)
+    merge_task[LogContext].scope = LogContext.scope
+    return merge_task
+
+def dedup_key(taskcfg: SBYBridge) -> str:
+    # parent traces are referenced through their canonical chunk, so identical paths give identical files
+    sbyfile = io.StringIO()
+    taskcfg.dump(sbyfile)
+    return hashlib.sha1(sbyfile.getvalue().encode()).hexdigest()
+
+def run_duplicate(task: TaskTree, solve_task: "tl.Task | None") -> tl.Task:
+    async def reuse():
+        if solve_task is not None:
+            await solve_task.finished
+        task_key = f"{task.linestr}_{task.name}"
+        alias_key = f"{task.alias.linestr}_{task.alias.name}"
+        for results in [SCYRunnerContext.task_steps, SCYRunnerContext.task_covers,
+                        SCYRunnerContext.task_states]:
+            if alias_key in results:
+                results[task_key] = results[alias_key]
+
+    reuse_task = tl.Task(on_run=reuse)
+    reuse_task[LogContext].scope = LogContext.scope
+    return reuse_task
+
+def run_unreach_proof(task: TaskTree, taskcfg: SBYBridge, bmc_task: "tl.Task | None"):
+    workdir = Path(SCYRunnerContext.scycfg.args.workdir)
+    task_key = f"{task.linestr}_{task.name}"
+    proof_dir = f"{task.dir}_proof"
+
+    proofcfg = gen_proof_sby(taskcfg, SCYRunnerContext.scycfg)
+    task_sby = workdir / f"{proof_dir}.sby"
+    log(f"generating {task_sby}")
+    with open(task_sby, 'w') as sbyfile:
+        proofcfg.dump(sbyfile)
+
+    if bmc_task is None:
+        return
+
+    async def on_proof_exit(event: tl.process.ExitEvent):
+        if task_key in SCYRunnerContext.task_proofs:
+            # bmc finished first
+            return
+        logfile = workdir / proof_dir / "logfile.txt"
+        status = SCYRunnerContext.sbycfg.status(logfile) if event.returncode == 0 else "ERROR"
+        SCYRunnerContext.task_proofs[task_key] = {"PASS": "UNREACHABLE", "FAIL": "REACHABLE"}.get(status, status)
+        if status == "PASS":
+            task.status = "UNREACHABLE"
+            bmc_task.cancel()
+            event_cmd = f"sby -f {task.dir}.sby"
+            bestguess = f"cover statement for {' '.join(task.cover_names)!r} proven unreachable"
+            tl.log_exception(SBYException(event_cmd, logfile, bestguess, "FAIL"))
+
+    async def on_bmc_finished():
+        await wait_for_task(bmc_task)
+        if task_key not in SCYRunnerContext.task_proofs:
+            SCYRunnerContext.task_proofs[task_key] = "CANCELLED"
+            proof_task.cancel()
+
+    sby_args = ["sby", "-f", f"{proof_dir}.sby"]
+    proof_task = tl.Process(sby_args, cwd=workdir)
+    proof_task.events(tl.process.ExitEvent).handle(on_proof_exit)
+    tl.Task(on_run=on_bmc_finished)
+
+annotation_types = {
+    "timeout": int,
+    "diversify": int,
+    "engine": str,
+    "depth": int,
+    "budget": int,
+}
+
+def check_annotations(task: TaskTree):
+    try:
+        shlex.split(task.asgmt or "")
+    except ValueError as e:
+        log_exception(SCYValueError(task.full_line, f"unable to parse annotations, {e}"))
+    for (key, value) in task.annotations.items():
+        if key not in annotation_types:
+            log_exception(SCYValueError(task.full_line, f"unknown annotation {key!r}"))
+        if annotation_types[key] is int:
+            try:
+                int(value)
+            except ValueError:
+                log_exception(SCYValueError(task.full_line, f"annotation {key!r} must be integer literal"))
+    budget = remaining_budget(task, SCYRunnerContext.task_steps)
+    if budget is not None and budget < 1:
+        log_exception(SCYTreeError(task.full_line, "cycle budget exhausted before statement"))
+
 def run_task():
     # loading context
     task = SCYTaskContext.task
@@ -230,25 +1019,69 @@ def run_task():
     setupmode = SCYRunnerContext.scycfg.args.setupmode
     LogContext.scope = task.full_line.strip(" \t:")
 
+    if task.status == "UNREACHABLE":
+        log_warning("skipping unreachable cover and its children")
+        return
+
     # default values
     task_trace = None
     root_task = None
 
     if task.uses_sby:
+        check_annotations(task)
         # generate sby
         taskcfg = gen_sby(task, SCYRunnerContext.sbycfg, SCYRunnerContext.scycfg,
-                            SCYRunnerContext.add_cells, SCYRunnerContext.enable_cells)
+                            SCYRunnerContext.add_cells, SCYRunnerContext.enable_cells,
+                            SCYRunnerContext.task_steps)
+        key = None
+        if SCYRunnerContext.scycfg.options.dedup:
+            key = dedup_key(taskcfg)
+            if key in SCYRunnerContext.dedup:
+                (task.alias, root_task) = SCYRunnerContext.dedup[key]
+                log(f"identical to {task.alias.full_line.strip(' :')!r}, reusing its result")
+        state_key = None
+        if SCYRunnerContext.scycfg.options.state_merge and not task.alias:
+            state_key = merge_key(task, taskcfg)
+            if state_key in SCYRunnerContext.state_merge:
+                (task.merged, root_task) = SCYRunnerContext.state_merge[state_key]
+                log(f"reaches the same state as {task.merged.full_line.strip(' :')!r}, reusing its result")
+        tuned_depth = None
+        if SCYRunnerContext.scycfg.args.autotune and SCYRunnerContext.history is not None:
+            tuned_depth = apply_history(task, taskcfg)
+        # state hashing needs the design with all covers
+        statecfg = taskcfg
+        prepared_il = SCYRunnerContext.prepared.get(f"{task.linestr}_{task.name}")
+        if prepared_il:
+            log(f"using prepared design {prepared_il}")
+            taskcfg = use_prepared_il(taskcfg, prepared_il)
         task_sby = workdir / f"{task.dir}.sby"
         log(f"generating {task_sby}")
         with open(task_sby, 'w') as sbyfile:
             taskcfg.dump(sbyfile)
         task_trace = f"{task.tracestr}.{SCYRunnerContext.scycfg.options.trace_ext}"
-        if not setupmode:
-            # run sby
-            sby_args = ["sby", "-f", f"{task.dir}.sby"]
-            root_task = tl.Process(sby_args, cwd=workdir)
-            root_task.events(tl.process.ExitEvent).handle(on_proc_exit)
-            root_task.events(tl.process.OutputEvent).process(handle_cover_output)
+        if task.alias:
+            if not setupmode:
+                root_task = run_duplicate(task, root_task)
+        elif task.merged:
+            if not setupmode:
+                root_task = run_merged(task, taskcfg, root_task)
+        else:
+            solve_task = None
+            if not setupmode:
+                # run sby
+                solve_task = run_solver(task, taskcfg, tuned_depth)
+                root_task = solve_task
+                if starts_early(task):
+                    root_task = run_witness_wait(task, solve_task)
+                if SCYRunnerContext.scycfg.options.state_merge:
+                    root_task = run_state_hash(task, statecfg, root_task)
+            if key:
+                SCYRunnerContext.dedup[key] = (task, root_task)
+            if state_key:
+                SCYRunnerContext.state_merge[state_key] = (task, root_task)
+            if SCYRunnerContext.scycfg.options.unreach_proof:
+                # try to prove the cover unreachable while the bmc is searching for it
+                run_unreach_proof(task, taskcfg, solve_task)
     elif task.stmt == "trace":
         if SCYRunnerContext.scycfg.options.replay_vcd:
             log_exception(SCYTreeError(task.stmt, "replay_vcd option incompatible with trace statement"))
@@ -296,5 +1129,10 @@ def run_task():
     task.update_children_traces(task_trace)
     task.update_children_enable_cells(recurse=False)
 
+    if SCYRunnerContext.scycfg.options.speculative_prep and root_task is not None:
+        for child in task.children:
+            if isinstance(child, TaskTree) and child.uses_sby:
+                run_child_prep(child)
+
     if SCYTaskContext.recurse:
         run_children(task.children, root_task)
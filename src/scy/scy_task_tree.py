@@ -1,3 +1,4 @@
+import shlex
 from typing import Iterable
 from yosys_mau import source_str
 from yosys_mau.source_str import (
@@ -12,7 +13,7 @@ def from_string(string: "SourceStr | str", L0: int = 0, depth: int = 0):
     tree_list: "list[TaskTree | str] | TaskTree" = []
     for tree in re.finditer(nest_regex, string, flags=re.MULTILINE):
         tree_str = tree.group()
-        stmt_regex = r"^(?P<ws>\s*)(?P<stmt>cover|append|trace|add|disable|enable) "\
+        stmt_regex = r"^(?P<ws>\s*)(?P<stmt>cover|cover_any|append|trace|add|disable|enable) "\
                     r"(?P<name>\S+?)( (?P<asgmt>.*?)|)(:\n(?P<body>.*)|:?\n|:?$)"
         m = re.search(stmt_regex, tree_str, flags=re.DOTALL)
         if not m: # no statement
@@ -62,6 +63,9 @@ class TaskTree:
             self.add_children(children)
         self.traces = []
         self.asgmt = asgmt
+        self.status: str = None
+        self.alias: "TaskTree | None" = None
+        self.merged: "TaskTree | None" = None
         if enable_cells:
             self.enable_cells = enable_cells
         else:
@@ -133,7 +137,7 @@ class TaskTree:
 
     @property
     def uses_sby(self) -> bool:
-        return self.stmt in ["cover", "common"]
+        return self.stmt in ["cover", "cover_any", "common"]
 
     @property
     def makes_dir(self) -> bool:
@@ -141,7 +145,37 @@ class TaskTree:
 
     @property
     def is_runnable(self) -> bool:
-        return self.stmt in ["cover", "trace"]
+        return self.stmt in ["cover", "cover_any", "trace"]
+
+    @property
+    def cover_names(self) -> "list[str]":
+        if self.stmt == "cover_any":
+            return [self.name] + [word for word in self.asgmt_words if "=" not in word]
+        elif self.stmt == "cover":
+            return [self.name]
+        else:
+            return []
+
+    @property
+    def asgmt_words(self) -> "list[str]":
+        try:
+            return shlex.split(self.asgmt or "")
+        except ValueError:
+            return (self.asgmt or "").split()
+
+    @property
+    def annotations(self) -> "dict[str, str]":
+        if self.stmt not in ["cover", "cover_any"]:
+            return {}
+        return dict(word.split("=", 1) for word in self.asgmt_words if "=" in word)
+
+    def get_annotation(self, key: str) -> "str | None":
+        try:
+            return self.annotations[key]
+        except KeyError:
+            if self.is_root:
+                return None
+            return self.parent.get_annotation(key)
 
     @property
     def has_local_enable_cells(self) -> bool:
@@ -149,7 +183,9 @@ class TaskTree:
 
     @property
     def tracestr(self) -> str:
-        if self.is_common:
+        if self.alias:
+            return self.alias.tracestr
+        elif self.is_common:
             return "common"
         elif self.uses_sby:
             return f"trace{self.line:03d}"
@@ -175,7 +211,9 @@ class TaskTree:
             return f"{self.linestr}_{self.name}"
 
     def get_dir(self) -> str:
-        if self.makes_dir:
+        if self.alias:
+            return self.alias.get_dir()
+        elif self.makes_dir:
             return self.dir
         else:
             return self.parent.get_dir()
@@ -0,0 +1,111 @@
+import json
+import time
+from pathlib import Path
+
+import yosys_mau.task_loop as tl
+
+terminal_states = ["done", "failed", "cancelled"]
+
+def task_name(task: tl.Task) -> str:
+    if isinstance(task, tl.Process):
+        return " ".join(Path(arg).name if i == 0 else arg for (i, arg) in enumerate(task.command))
+    on_run = getattr(task, "on_run", None)
+    return getattr(on_run, "__name__", type(task).__name__)
+
+def assign_lanes(spans: "list[dict]") -> "list[dict]":
+    # like job slots, a span goes to the first lane that is free when it starts
+    lane_ends: "list[float]" = []
+    for span in sorted(spans, key=lambda span: (span["start"], span["end"])):
+        for (lane, end) in enumerate(lane_ends):
+            if end <= span["start"]:
+                break
+        else:
+            lane = len(lane_ends)
+            lane_ends.append(0)
+        lane_ends[lane] = span["end"]
+        span["lane"] = lane
+    return spans
+
+def trace_events(spans: "list[dict]", edges: "list[tuple[int, int]]") -> "list[dict]":
+    events = []
+    groups = {"task": 1, "process": 2}
+    for (group, pid) in groups.items():
+        events.append({"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": f"{group}s"}})
+    by_id = {}
+    for group in groups:
+        for span in assign_lanes([span for span in spans if span["cat"] == group]):
+            by_id[span["id"]] = span
+            events.append({
+                "ph": "X", "name": span["name"], "cat": span["cat"], "pid": groups[group],
+                "tid": span["lane"], "ts": round(span["start"] * 1e6),
+                "dur": round((span["end"] - span["start"]) * 1e6), "args": {"state": span["state"]},
+            })
+    for (flow_id, (source_id, target_id)) in enumerate(edges):
+        if source_id not in by_id or target_id not in by_id:
+            continue
+        (source, target) = (by_id[source_id], by_id[target_id])
+        events.append({"ph": "s", "name": "depends_on", "cat": "dependency", "id": flow_id,
+                       "pid": groups[source["cat"]], "tid": source["lane"],
+                       "ts": round(source["end"] * 1e6)})
+        events.append({"ph": "f", "bp": "e", "name": "depends_on", "cat": "dependency", "id": flow_id,
+                       "pid": groups[target["cat"]], "tid": target["lane"],
+                       "ts": round(target["start"] * 1e6)})
+    return events
+
+class Timeline():
+    def __init__(self):
+        self.start_time = time.monotonic()
+        # keeps the tasks alive, so their ids stay unique
+        self.tasks: "list[tl.Task]" = []
+        self.spans: "dict[int, dict]" = {}
+        self.edges: "list[tuple[int, int]]" = []
+
+    def install(self, task: tl.Task):
+        # the task loop reports every state change as a debug event, which is passed on to all parents
+        task.events(tl.DebugEvent).handle(self.on_event)
+
+    def now(self) -> float:
+        return time.monotonic() - self.start_time
+
+    def add_dependency(self, task: tl.Task, dependency: tl.Task):
+        self.edges.append((id(dependency), id(task)))
+
+    def on_event(self, event: tl.DebugEvent):
+        task = event.source
+        now = self.now()
+        span = self.spans.get(id(task))
+        if span is None:
+            self.tasks.append(task)
+            span = self.spans[id(task)] = {
+                "id": id(task),
+                "name": task_name(task),
+                "cat": "process" if isinstance(task, tl.Process) else "task",
+                "created": now,
+                "start": None,
+                "end": None,
+                "state": None,
+            }
+        if span["end"] is not None:
+            return
+        state = task.state
+        if state == "running" and span["start"] is None:
+            span["start"] = now
+        elif state in terminal_states:
+            span["start"] = span["start"] if span["start"] is not None else now
+            span["end"] = now
+            span["state"] = state
+
+    def write(self, path: "Path | str"):
+        now = self.now()
+        spans = []
+        for span in self.spans.values():
+            span = dict(span)
+            if span["start"] is None:
+                # never seen running, show the time it was waiting
+                span["start"] = span["created"]
+            if span["end"] is None:
+                span["end"] = now
+                span["state"] = "unfinished"
+            spans.append(span)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events(spans, self.edges), "displayTimeUnit": "ms"}, f)
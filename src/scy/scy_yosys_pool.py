@@ -0,0 +1,87 @@
+import asyncio
+from pathlib import Path
+
+class YosysWorker():
+    def __init__(self, cwd: Path, common_il: str):
+        self.cwd = cwd
+        self.common_il = common_il
+        self.proc: "asyncio.subprocess.Process | None" = None
+        self.jobs = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            "yosys", "-Q",
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        # keep the parsed common design around for every job
+        (returncode, _) = await self.send([f"read_rtlil {self.common_il}", "design -save common"])
+        if returncode != 0:
+            raise RuntimeError(f"yosys worker failed to load {self.common_il}")
+
+    async def send(self, script: "list[str]") -> "tuple[int, list[str]]":
+        self.jobs += 1
+        sentinel = f"SCY_WORKER_DONE_{self.jobs}"
+        commands = script + [f"log {sentinel}"]
+        self.proc.stdin.write("".join(f"{command}\n" for command in commands).encode())
+        await self.proc.stdin.drain()
+
+        output = []
+        returncode = 0
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                # worker died, the job is lost
+                return (1, output)
+            line = line.decode(errors="replace").rstrip("\n")
+            if line.strip() == sentinel:
+                return (returncode, output)
+            if line.startswith("ERROR:"):
+                returncode = 1
+            output.append(line)
+
+    async def run(self, script: "list[str]") -> "tuple[int, list[str]]":
+        if not self.alive:
+            await self.start()
+        if script and script[0] == f"read_rtlil {self.common_il}":
+            script = ["design -load common"] + script[1:]
+        else:
+            script = ["design -reset"] + script
+        return await self.send(script)
+
+    def close(self):
+        if self.alive:
+            self.proc.stdin.close()
+            self.proc.kill()
+
+class YosysPool():
+    def __init__(self, size: int, cwd: Path, common_il: str):
+        self.size = size
+        self.cwd = cwd
+        self.common_il = common_il
+        self.workers: "list[YosysWorker]" = []
+        self.idle: "asyncio.Queue[YosysWorker] | None" = None
+
+    async def run(self, script: "list[str]") -> "tuple[int, list[str]]":
+        if self.idle is None:
+            self.idle = asyncio.Queue()
+        if self.idle.empty() and len(self.workers) < self.size:
+            # workers are started on demand
+            worker = YosysWorker(self.cwd, self.common_il)
+            self.workers.append(worker)
+        else:
+            worker = await self.idle.get()
+        try:
+            return await worker.run(script)
+        finally:
+            self.idle.put_nowait(worker)
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
@@ -0,0 +1,25 @@
+import pathlib
+
+from scy.scy import batch_args, duplicate_jobnames
+from scy.scy_config_parser import SCY_arg_parser
+
+def test_batch_args():
+    args = SCY_arg_parser(batch=True).parse_args(["-j", "4", "a.scy", "dir/b.scy"])
+    assert args.scyfiles == ["a.scy", "dir/b.scy"]
+    file_args = batch_args(args, "dir/b.scy")
+    assert file_args.scyfile == "dir/b.scy"
+    assert file_args.workdir is None
+    assert file_args.jobcount == 4
+    assert not hasattr(file_args, "scyfiles")
+    assert args.scyfiles == ["a.scy", "dir/b.scy"]
+
+def test_batch_args_workdir():
+    args = SCY_arg_parser(batch=True).parse_args(["-d", "runs", "--stats-json", "out/stats.json",
+                                                  "a.scy", "b.scy"])
+    file_args = batch_args(args, "b.scy")
+    assert pathlib.Path(file_args.workdir) == pathlib.Path("runs") / "b"
+    assert pathlib.Path(file_args.stats_json) == pathlib.Path("out") / "b_stats.json"
+
+def test_batch_duplicate_jobnames():
+    assert duplicate_jobnames(["a.scy", "dir/b.scy"]) == []
+    assert duplicate_jobnames(["a/top.scy", "b/top.scy", "c.scy"]) == ["top"]
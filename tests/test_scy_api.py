@@ -0,0 +1,116 @@
+import pathlib
+import pytest
+from textwrap import dedent
+
+from scy.scy_api import SCYResult, run_scy
+from scy.scy_config_parser import SCYConfig
+from scy.scy_task_tree import TaskTree
+
+def chunk(line: int, steps: "int | None", status: str) -> dict:
+    return {"line": line, "stmt": "cover", "name": f"c{line}", "steps": steps, "status": status}
+
+def test_api_result(tmp_path: pathlib.Path):
+    traces = [{"line": 4, "name": "reset", "cycles": 3, "files": ["reset.yw", "reset.vcd"]}]
+    result = SCYResult(tmp_path, [chunk(1, 2, "PASS"), chunk(3, None, "ABORTED")], traces)
+    assert not result.passed
+    assert result.steps == {1: 2, 3: None}
+    assert result.chunk(3)["status"] == "ABORTED"
+    assert result.chunk(2) is None
+    assert result.trace_paths("reset") == [tmp_path / "reset.yw", tmp_path / "reset.vcd"]
+    assert result.trace_paths("other") == []
+
+def test_api_result_passed(tmp_path: pathlib.Path):
+    assert SCYResult(tmp_path, [chunk(1, 2, "PASS")], []).passed
+    assert not SCYResult(tmp_path, [chunk(1, 2, "PASS")], [], RuntimeError()).passed
+
+def test_api_needs_workdir():
+    with pytest.raises(ValueError):
+        run_scy("[sequence]\ncover a\n")
+
+up_counter_scy = dedent("""
+        [design]
+        read -sv up_counter.sv
+        prep -top up_counter
+
+        [sequence]
+        cover cp_7:
+            cover cp_3
+            cover cp_14:
+                cover cp_12:
+                    trace up_to_12
+
+        [file up_counter.sv]
+        module up_counter (
+            input clock,
+            input reset,
+            input reverse,
+            output [7:0] value
+        );
+            reg [7:0] count;
+
+            assign value = count;
+
+            initial begin
+                count = 0;
+            end
+
+            always @(posedge clock) begin
+                if (reset && reverse) begin
+                    count = 8'h ff;
+                end else if (reset && !reverse) begin
+                    count = 8'h 00;
+                end else if (!reset && reverse) begin
+                    count = count-1;
+                end else /*(!reset && !reverse)*/ begin
+                    count = count+1;
+                end
+
+                if (!reset) begin
+                    cp_3: cover(count==3);
+                    cp_7: cover(count==7);
+                    cp_12: cover(count==12);
+                    cp_14: cover(count==14);
+                end
+            end
+        endmodule
+""")
+
+@pytest.mark.parametrize("from_file", [True, False])
+def test_run_scy_up_counter(tmp_path: pathlib.Path, from_file: bool):
+    workdir = tmp_path / "run"
+    if from_file:
+        scyfile = tmp_path / "up_counter.scy"
+        scyfile.write_text(up_counter_scy)
+        result = run_scy(scyfile, workdir=workdir)
+    else:
+        result = run_scy(up_counter_scy, workdir=workdir)
+    assert result.error is None
+    assert result.passed
+    assert result.workdir == workdir
+    steps = {chunk["name"]: chunk["steps"] for chunk in result.chunks}
+    assert steps == {"cp_7": 7, "cp_3": 4, "cp_14": 7, "cp_12": 2}
+    assert all(chunk["status"] == "PASS" for chunk in result.chunks)
+    trace_paths = result.trace_paths("up_to_12")
+    assert trace_paths == [workdir / "up_to_12.yw", workdir / "up_to_12.vcd"]
+    assert all(path.exists() for path in trace_paths)
+
+def test_run_scy_shard(tmp_path: pathlib.Path):
+    # two top level covers, one for each shard
+    (design, rest) = up_counter_scy.split("[sequence]\n")
+    scy = design + "[sequence]\ncover cp_7:\n    cover cp_3\ncover cp_14:\n    cover cp_12\n\n"
+    scy += rest[rest.index("[file"):]
+    names: "list[str]" = []
+    for index in [1, 2]:
+        result = run_scy(scy, workdir=tmp_path / f"shard{index}", args=["--shard", f"{index}/2"])
+        assert result.error is None
+        assert result.passed
+        names += [chunk["name"] for chunk in result.chunks]
+    assert sorted(names) == ["cp_12", "cp_14", "cp_3", "cp_7"]
+
+def test_run_scy_config_reused(tmp_path: pathlib.Path):
+    scycfg = SCYConfig(up_counter_scy)
+    for run in ["first", "second"]:
+        result = run_scy(scycfg, workdir=tmp_path / run)
+        assert result.error is None
+        assert result.passed
+    assert all(tree.parent is None for tree in scycfg.sequence if isinstance(tree, TaskTree))
@@ -0,0 +1,55 @@
+import pathlib
+import pytest
+
+from scy.scy_continuation import cell_states, export_bundle, load_bundle
+from scy.scy_task_tree import TaskTree
+
+@pytest.fixture
+def tree() -> TaskTree:
+    return TaskTree.from_string("cover a:\n cover b:\n  disable x\n append 2\n")[0]
+
+def test_continuation_cell_states(tree: TaskTree):
+    b = tree.children[0]
+    b.enable_cells = {
+        "x": {"status": "enable", "enable": "$auto$1"},
+        "y": {"status": "disable", "enable": "$auto$2"},
+        "$auto$3": {"type": "assert", "lhs": "ok", "cell": "$auto$3"},
+    }
+    (enable_cells, add_cells) = cell_states(b)
+    assert enable_cells == {"x": "disable", "y": "disable"}
+    assert add_cells == [{"type": "assert", "lhs": "ok"}]
+
+def write_traces(workdir: pathlib.Path, task: TaskTree, traces: "list[str]"):
+    task_dir = workdir / task.get_dir()
+    (task_dir / "src").mkdir(parents=True)
+    (task_dir / "engine_0").mkdir()
+    for trace in traces:
+        (task_dir / "src" / trace).write_text(trace)
+    (task_dir / "engine_0" / "trace0.yw").write_text("own")
+
+def test_continuation_export(tree: TaskTree, tmp_path: pathlib.Path):
+    b = tree.children[0]
+    tree.steps = 2
+    b.steps = 3
+    b.traces = ["trace001.yw"]
+    write_traces(tmp_path, b, ["trace001.yw"])
+    outdir = tmp_path / "continue_L2"
+    export_bundle(b, tmp_path, outdir, "yw", "abc", "test.scy")
+    bundle = load_bundle(outdir)
+    assert bundle["traces"] == ["prefix0.yw", "prefix1.yw"]
+    assert bundle["cycles"] == 5
+    assert bundle["design_hash"] == "abc"
+    assert bundle["path"] == str(outdir.absolute())
+    assert (outdir / "prefix0.yw").read_text() == "trace001.yw"
+    assert (outdir / "prefix1.yw").read_text() == "own"
+
+def test_continuation_export_append(tree: TaskTree, tmp_path: pathlib.Path):
+    append = tree.children[1]
+    tree.steps = 4
+    append.steps = 2
+    append.traces = ["trace001.yw -append 2"]
+    write_traces(tmp_path, tree, [])
+    bundle = export_bundle(append, tmp_path, tmp_path / "out", "yw", "abc", "test.scy")
+    assert bundle["traces"] == ["prefix0.yw -append 2"]
+    assert bundle["cycles"] == 6
+    assert (tmp_path / "out" / "prefix0.yw").read_text() == "own"
@@ -0,0 +1,48 @@
+import pytest
+
+from scy.scy_estimate import (
+    compare_jobs,
+    critical_path,
+    default_duration,
+    estimate,
+    node_durations,
+    simulate,
+)
+from scy.scy_task_tree import TaskTree
+
+@pytest.fixture
+def root() -> TaskTree:
+    sequence = TaskTree.from_string("cover a:\n cover b\n cover c:\n  cover d\ncover e\n")
+    return TaskTree.make_common(children=sequence)
+
+def durations_by_name(root: TaskTree, times: "dict[str, float]") -> "dict[str, float]":
+    return {task.dir: times.get(task.name, 0.0) for task in root.traverse()}
+
+def test_estimate_default(root: TaskTree):
+    (durations, defaulted) = node_durations(root)
+    assert defaulted == 5
+    assert durations[root.dir] == 0.0
+    assert all(duration == default_duration for (chunk, duration) in durations.items() if chunk != root.dir)
+
+def test_estimate_stats(root: TaskTree):
+    b = root.children[0].children[0]
+    stats = {"nodes": [{"chunk": b.dir, "wall_time": 3.0, "runs": [{}]}]}
+    (durations, defaulted) = node_durations(root, stats)
+    assert durations[b.dir] == 3.0
+    assert defaulted == 4
+
+@pytest.mark.parametrize("jobs,makespan", [(1, 15), (2, 9), (4, 7)])
+def test_estimate_simulate(root: TaskTree, jobs: int, makespan: float):
+    durations = durations_by_name(root, {"a": 2, "b": 4, "c": 3, "d": 2, "e": 4})
+    assert simulate(root, durations, jobs) == (makespan, 15)
+
+def test_estimate_critical_path(root: TaskTree):
+    durations = durations_by_name(root, {"a": 2, "b": 4, "c": 3, "d": 2, "e": 4})
+    (length, path) = critical_path(root, durations)
+    assert length == 7
+    assert [task.name for task in path[1:]] == ["a", "c", "d"]
+    assert estimate(root, durations, 4)["utilisation"] == pytest.approx(15 / 28)
+
+def test_estimate_compare_jobs():
+    assert compare_jobs(4) == [1, 2, 4, 8]
+    assert compare_jobs(1) == [1, 2]
@@ -0,0 +1,61 @@
+import pathlib
+import pytest
+
+from scy.scy_history import RunHistory, max_records, node_signature
+from scy.scy_task_tree import TaskTree
+
+@pytest.fixture
+def tree() -> TaskTree:
+    return TaskTree.from_string("cover a:\n cover b\n")[0]
+
+@pytest.fixture
+def history(tmp_path: pathlib.Path) -> RunHistory:
+    return RunHistory(tmp_path / "history.json")
+
+def test_history_empty(history: RunHistory, tree: TaskTree):
+    assert history.best(tree) is None
+    assert history.records(tree) == []
+
+def test_history_roundtrip(history: RunHistory, tree: TaskTree):
+    history.record(tree, "smtbmc boolector", 20, 7, 3, "PASS")
+    history.save()
+    loaded = RunHistory(history.path)
+    assert loaded.best(tree)["engine"] == "smtbmc boolector"
+    assert loaded.best(tree)["steps"] == 7
+
+def test_history_best(history: RunHistory, tree: TaskTree):
+    history.record(tree, "smtbmc boolector", 20, 7, 9, "PASS")
+    history.record(tree, "abc bmc3", 20, 7, 2, "PASS")
+    history.record(tree, "smtbmc yices", 20, None, 1, "TIMEOUT")
+    assert history.best(tree)["engine"] == "abc bmc3"
+
+def test_history_limit(history: RunHistory, tree: TaskTree):
+    for i in range(max_records + 5):
+        history.record(tree, "smtbmc boolector", 20, 7, i, "PASS")
+    assert len(history.records(tree)) == max_records
+    assert history.best(tree)["wall_time"] == 5
+
+@pytest.mark.parametrize("other,match", [
+    ("cover a:\n cover b\n", True),
+    ("cover a timeout=5:\n cover b\n", False),
+    ("cover c:\n cover b\n", False),
+])
+def test_history_signature(tree: TaskTree, other: str, match: bool):
+    other_tree = TaskTree.from_string(other)[0]
+    assert other_tree.children[0].dir == tree.children[0].dir
+    assert (node_signature(other_tree.children[0]) == node_signature(tree.children[0])) == match
+
+def test_history_last_steps(history: RunHistory, tree: TaskTree):
+    assert history.last_steps(tree) is None
+    history.record(tree, "smtbmc boolector", 20, 7, 9, "PASS")
+    history.record(tree, "smtbmc boolector", 20, 5, 9, "PASS")
+    history.record(tree, "smtbmc boolector", 6, None, 9, "FAIL")
+    assert history.last_steps(tree) == 5
+
+def test_history_witness(history: RunHistory, tree: TaskTree, tmp_path: pathlib.Path):
+    trace = tmp_path / "trace0.yw"
+    trace.write_text("{}")
+    assert history.witness(tree) is None
+    history.store_witness(tree, trace)
+    assert history.witness(tree).read_text() == "{}"
+    assert history.witness(tree.children[0]) is None
@@ -0,0 +1,44 @@
+import pathlib
+import pytest
+
+from scy.scy_journal import Journal
+from scy.scy_task_tree import TaskTree
+
+@pytest.fixture
+def tree() -> TaskTree:
+    return TaskTree.from_string("cover a:\n cover b\n")[0]
+
+@pytest.fixture
+def witness(tmp_path: pathlib.Path, tree: TaskTree) -> pathlib.Path:
+    trace = tmp_path / tree.dir / "engine_0" / "trace0.yw"
+    trace.parent.mkdir(parents=True)
+    trace.write_text("{}")
+    return trace
+
+def test_journal_roundtrip(tmp_path: pathlib.Path, tree: TaskTree, witness: pathlib.Path):
+    journal = Journal(tmp_path / "journal.jsonl")
+    assert journal.completed(tree, tmp_path) is None
+    journal.record(tree, 5, witness, tmp_path)
+    loaded = Journal(tmp_path / "journal.jsonl")
+    entry = loaded.completed(tree, tmp_path)
+    assert entry["steps"] == 5
+    assert entry["witness"] == str(pathlib.Path(tree.dir) / "engine_0" / "trace0.yw")
+    assert loaded.completed(tree.children[0], tmp_path) is None
+
+def test_journal_checksum(tmp_path: pathlib.Path, tree: TaskTree, witness: pathlib.Path):
+    journal = Journal(tmp_path / "journal.jsonl")
+    journal.record(tree, 5, witness, tmp_path)
+    witness.write_text("{\"steps\": []}")
+    assert journal.completed(tree, tmp_path) is None
+    witness.unlink()
+    assert journal.completed(tree, tmp_path) is None
+
+def test_journal_partial(tmp_path: pathlib.Path, tree: TaskTree, witness: pathlib.Path):
+    path = tmp_path / "journal.jsonl"
+    Journal(path).record(tree, 5, witness, tmp_path)
+    with open(path, "a") as f:
+        f.write("{\"chunk\": \"L002")
+    journal = Journal(path)
+    assert journal.completed(tree, tmp_path)["steps"] == 5
+    journal.record(tree, 4, witness, tmp_path)
+    assert Journal(path).completed(tree, tmp_path)["steps"] == 4
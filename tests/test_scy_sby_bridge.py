@@ -2,7 +2,18 @@ import os
 import pytest
 import pathlib
 
-from scy.scy_sby_bridge import SBYBridge
+from scy.scy_sby_bridge import (
+    SBYBridge,
+    gen_engine_variants,
+    gen_prep_script,
+    gen_replay_script,
+    gen_state_script,
+    match_cover,
+    remaining_budget,
+    use_prepared_il,
+    uses_prepared_il,
+)
+from scy.scy_task_tree import TaskTree
 
 @pytest.fixture(params=[
             {},
@@ -62,4 +73,128 @@ def test_bridge_fix_paths(pre: "list[str]", ofs: str, post: "list[str]"):
     for (a, b) in zip(sbybridge.files, post):
         assert a == str(b)
 
+@pytest.mark.parametrize("options,name,value", [
+        ([], "expect", None),
+        (["expect pass", "depth 10"], "expect", "pass"),
+        (["expect pass", "depth 10"], "depth", "10"),
+        (["", "mode cover"], "mode", "cover"),
+])
+def test_bridge_get_option(options: "list[str]", name: str, value: "str | None"):
+    sbybridge = SBYBridge({"options": options})
+    assert sbybridge.get_option(name) == value
+
+@pytest.mark.parametrize("options", [
+        [],
+        ["expect pass"],
+        ["mode cover", "expect pass", "depth 10"],
+])
+def test_bridge_set_option(options: "list[str]"):
+    sbybridge = SBYBridge({"options": options})
+    sbybridge.set_option("expect", "pass,fail")
+    assert sbybridge.get_option("expect") == "pass,fail"
+    assert len([o for o in sbybridge.options if o.startswith("expect")]) == 1
+    assert len(sbybridge.options) == len([o for o in options if not o.startswith("expect")]) + 1
+
+@pytest.mark.parametrize("name,reached,expected", [
+        ("cp_a", [], False),
+        ("cp_a", ["cp_a"], True),
+        ("cp_a", ["top.cp_a"], True),
+        ("cp_a", ["top.cp_ab"], False),
+        ("inst.cp_a", ["top.inst.cp_a", "cp_b"], True),
+])
+def test_match_cover(name: str, reached: "list[str]", expected: bool):
+    assert match_cover(name, reached) == expected
+
+@pytest.mark.parametrize("engines,variants,count,expected", [
+        (["smtbmc boolector"], "", 1, [["smtbmc boolector"]]),
+        (["smtbmc boolector"], "", 3, [["smtbmc boolector"],
+                                       ["smtbmc --unroll boolector"],
+                                       ["smtbmc --noincr boolector"]]),
+        (["smtbmc yices"], "abc bmc3\n\n", 2, [["smtbmc yices"], ["abc bmc3"]]),
+        (["abc bmc3"], "", 4, [["abc bmc3"]]),
+])
+def test_gen_engine_variants(engines: "list[str]", variants: str, count: int,
+                             expected: "list[list[str]]"):
+    assert gen_engine_variants(engines, variants, count) == expected
+
+@pytest.mark.parametrize("sequence,steps,expected", [
+        ("cover a:\n cover b\n", {}, None),
+        ("cover a budget=30:\n cover b\n", {}, 30),
+        ("cover a budget=30:\n cover b\n", {"L001_000_a": 12}, 18),
+        ("cover a budget=30:\n append 5:\n  cover b\n", {"L001_000_a": 12, "L002_001_5": 5}, 13),
+        ("cover a:\n cover b budget=10\n", {"L001_000_a": 12}, 10),
+])
+def test_remaining_budget(sequence: str, steps: "dict[str, int]", expected: "int | None"):
+    task = TaskTree.from_string(sequence)[0]
+    while task.children:
+        task = task.children[0]
+    assert remaining_budget(task, steps) == expected
+
+def test_gen_replay_script():
+    taskcfg = SBYBridge({
+        "files": ["common_design.il common/model/design_prep.il",
+                  "trace001.yw L001_000_a/engine_0/trace0.yw"],
+        "script": ["read_rtlil common_design.il",
+                   "sim -w -r trace001.yw -append 2",
+                   "delete t:$cover c:cp_b %d"],
+    })
+    assert gen_replay_script(taskcfg, "/tmp/w.yw") == [
+        "read_rtlil common/model/design_prep.il",
+        "sim -w -r L001_000_a/engine_0/trace0.yw -append 2",
+        "delete t:$cover c:cp_b %d",
+        "sim -r /tmp/w.yw",
+    ]
+
+def test_gen_state_script():
+    taskcfg = SBYBridge({
+        "files": ["common_design.il common/model/design_prep.il"],
+        "script": ["read_rtlil common_design.il",
+                   "connect -port en_cell \\EN 1'b1",
+                   "delete t:$cover c:cp_b %d",
+                   "select -assert-count 1 t:$cover"],
+    })
+    assert gen_state_script(taskcfg, "a/engine_0/trace0.yw", "a_state.il") == [
+        "read_rtlil common/model/design_prep.il",
+        "connect -port en_cell \\EN 1'b1",
+        "sim -w -r a/engine_0/trace0.yw",
+        "write_rtlil a_state.il",
+    ]
+
+@pytest.fixture
+def child_cfg() -> SBYBridge:
+    return SBYBridge({
+        "files": ["common_design.il common/model/design_prep.il",
+                  "trace001.yw L001_000_a/src/trace001.yw",
+                  "trace002.yw L002_001_b/engine_0/trace0.yw"],
+        "script": ["read_rtlil common_design.il",
+                   "sim -w -r trace001.yw",
+                   "sim -w -r trace002.yw -append 1",
+                   "delete t:$cover c:cp_c %d",
+                   "select -assert-count 1 t:$cover",
+                   "chformal -skip 1 c:ap_x"],
+    })
+
+def test_gen_prep_script(child_cfg: SBYBridge):
+    assert gen_prep_script(child_cfg, "c_prep.il") == [
+        "read_rtlil common/model/design_prep.il",
+        "sim -w -r L001_000_a/src/trace001.yw",
+        "delete t:$cover c:cp_c %d",
+        "select -assert-count 1 t:$cover",
+        "write_rtlil c_prep.il",
+    ]
+
+def test_use_prepared_il(child_cfg: SBYBridge):
+    prepared = use_prepared_il(child_cfg, "c_prep.il")
+    assert prepared.script == [
+        "read_rtlil prepared.il",
+        "sim -w -r trace002.yw -append 1",
+        "chformal -skip 1 c:ap_x",
+    ]
+    assert "prepared.il c_prep.il" in prepared.files
+    assert "trace001.yw L001_000_a/src/trace001.yw" in prepared.files
+    assert "common_design.il common/model/design_prep.il" not in prepared.files
+    assert child_cfg.script[0] == "read_rtlil common_design.il"
+    assert uses_prepared_il(prepared)
+    assert not uses_prepared_il(child_cfg)
+
 #TODO: test SBYBridge.dump() and SBYBridge.dump_common()
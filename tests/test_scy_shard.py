@@ -0,0 +1,61 @@
+import argparse
+import json
+import pathlib
+import pytest
+
+from scy.scy_config_parser import shard_spec
+from scy.scy_shard import assign_shards, bundle_name, format_chunk, merge_bundles, select_shard
+from scy.scy_task_tree import TaskTree
+
+@pytest.fixture
+def sequence() -> "list[TaskTree]":
+    return TaskTree.from_string("cover a:\n cover b\n cover c\ncover d\ncover e\ncover f\n")
+
+@pytest.mark.parametrize("value,expected", [
+    ("1/2", (1, 2)),
+    ("3/3", (3, 3)),
+    ("0/2", None),
+    ("3/2", None),
+    ("1", None),
+])
+def test_shard_spec(value: str, expected: "tuple[int, int] | None"):
+    if expected is None:
+        with pytest.raises(argparse.ArgumentTypeError):
+            shard_spec(value)
+    else:
+        assert shard_spec(value) == expected
+
+def test_shard_assign(sequence: "list[TaskTree]"):
+    durations = {task.dir: 1.0 for tree in sequence for task in tree.traverse()}
+    shards = assign_shards(sequence, durations, 2)
+    assert [[tree.name for tree in shard] for shard in shards] == [["a"], ["d", "e", "f"]]
+    assert select_shard(sequence + ["# comment"], durations, 2, 2) == shards[1]
+
+def test_shard_assign_all(sequence: "list[TaskTree]"):
+    shards = assign_shards(sequence, {}, 3)
+    assert sorted(tree.name for shard in shards for tree in shard) == ["a", "d", "e", "f"]
+    assert [len(shard) for shard in shards] == [2, 1, 1]
+
+def write_bundle(path: pathlib.Path, shard: "list[int]", chunks: "list[dict]"):
+    path.mkdir()
+    (path / "reset.vcd").write_text("vcd")
+    traces = [{"line": 9, "name": "reset", "cycles": 4, "chunks": ["L1"], "files": ["reset.vcd"]}]
+    (path / bundle_name).write_text(json.dumps({"version": 1, "shard": shard, "chunks": chunks,
+                                                "traces": traces if shard[0] == 1 else []}))
+
+def chunk(line: int, name: str, cycles: "list[int] | None") -> dict:
+    return {"line": line, "stmt": "cover", "name": name, "depth": 0, "cycles": cycles,
+            "steps": cycles[1] - cycles[0] + 1 if cycles else None,
+            "status": "PASS" if cycles else "ABORTED"}
+
+def test_shard_merge(tmp_path: pathlib.Path):
+    write_bundle(tmp_path / "s1", [1, 3], [chunk(5, "b", None)])
+    write_bundle(tmp_path / "s2", [2, 3], [chunk(1, "a", [0, 3])])
+    outdir = tmp_path / "out"
+    outdir.mkdir()
+    merged = merge_bundles([tmp_path / "s1", tmp_path / "s2"], outdir)
+    assert merged["missing"] == [3]
+    assert [chunk["name"] for chunk in merged["chunks"]] == ["a", "b"]
+    assert (outdir / "reset.vcd").read_text() == "vcd"
+    assert format_chunk(merged["chunks"][0]) == "  L1       0 ..  3  =>   4  a"
+    assert "ABORTED" in format_chunk(merged["chunks"][1])
@@ -0,0 +1,52 @@
+import pathlib
+
+from scy.scy_stats import dir_size, node_record, run_totals
+from scy.scy_task_tree import TaskTree
+
+def test_stats_dir_size(tmp_path: pathlib.Path):
+    (tmp_path / "a").write_text("1234")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b").write_text("56")
+    assert dir_size(tmp_path) == 6
+    assert dir_size(tmp_path / "missing") == 0
+
+def test_stats_node_record():
+    tree = TaskTree.from_string("cover a:\n cover b\n")[0]
+    runs = [
+        {"engine": "smtbmc boolector", "queue_wait": 1.0, "wall_time": 10.0, "cpu_time": 9.0,
+         "peak_rss": 100, "exit_code": 8, "exit_type": "TIMEOUT", "bytes_written": 50},
+        {"engine": "abc bmc3", "queue_wait": 0.5, "wall_time": 2.0, "cpu_time": None,
+         "peak_rss": 300, "exit_code": 0, "exit_type": "PASS", "bytes_written": 20},
+    ]
+    record = node_record(tree, runs, 5, "PASS")
+    assert record["chunk"] == tree.dir
+    assert record["engine"] == "abc bmc3"
+    assert record["exit_type"] == "PASS"
+    assert record["wall_time"] == 12.0
+    assert record["cpu_time"] == 9.0
+    assert record["peak_rss"] == 300
+    assert record["bytes_written"] == 70
+
+    empty = node_record(tree.children[0], [], None, "ABORTED")
+    assert "engine" not in empty
+
+    totals = run_totals([record, empty], 20.0)
+    assert totals["nodes"] == 2
+    assert totals["sby_runs"] == 2
+    assert totals["solver_wall_time"] == 12.0
+    assert totals["peak_rss"] == 300
+
+def test_stats_trace_record():
+    tree = TaskTree.from_string("cover a:\n trace t\n")[0]
+    runs = [{"engine": "yosys", "wall_time": 1.5, "cpu_time": None, "peak_rss": 400,
+             "exit_code": 0, "exit_type": "PASS", "bytes_written": 10}]
+    trace = node_record(tree.children[0], runs, None, "PASS")
+    assert trace["stmt"] == "trace"
+    assert trace["engine"] == "yosys"
+
+    solver = node_record(tree, [{"wall_time": 3.0, "peak_rss": 100}], 5, "PASS")
+    totals = run_totals([solver, trace], 10.0)
+    assert totals["nodes"] == 2
+    assert totals["sby_runs"] == 1
+    assert totals["solver_wall_time"] == 3.0
+    assert totals["peak_rss"] == 400
@@ -1,4 +1,6 @@
 from contextlib import nullcontext as does_not_raise
+import json
+import os
 import pathlib
 import pytest
 from textwrap import dedent
@@ -23,6 +25,16 @@ class TaskRunner():
         self.add_cells: "dict[int, dict[str]]" = {}
         self.enable_cells: "dict[str, dict[str, str | bool]]" = {}
         self.task_steps: "dict[str, int]" = {}
+        self.task_covers: "dict[str, str]" = {}
+        self.task_proofs: "dict[str, str]" = {}
+        self.task_progress: "dict[str, dict]" = {}
+        self.task_variants: "dict[str, str]" = {}
+        self.dedup: "dict[str, tuple]" = {}
+        self.state_merge: "dict[str, tuple]" = {}
+        self.task_states: "dict[str, str]" = {}
+        self.task_started: "dict[str, float]" = {}
+        self.prepared: "dict[str, str]" = {}
+        self.task_stats: "dict[str, list[dict]]" = {}
 
     def _prep_loop(self, recurse: bool):
         scytr.SCYTaskContext.recurse = recurse
@@ -31,6 +43,16 @@ class TaskRunner():
         scytr.SCYRunnerContext.add_cells = self.add_cells
         scytr.SCYRunnerContext.enable_cells = self.enable_cells
         scytr.SCYRunnerContext.task_steps = self.task_steps
+        scytr.SCYRunnerContext.task_covers = self.task_covers
+        scytr.SCYRunnerContext.task_proofs = self.task_proofs
+        scytr.SCYRunnerContext.task_progress = self.task_progress
+        scytr.SCYRunnerContext.task_variants = self.task_variants
+        scytr.SCYRunnerContext.dedup = self.dedup
+        scytr.SCYRunnerContext.state_merge = self.state_merge
+        scytr.SCYRunnerContext.task_states = self.task_states
+        scytr.SCYRunnerContext.task_started = self.task_started
+        scytr.SCYRunnerContext.prepared = self.prepared
+        scytr.SCYRunnerContext.task_stats = self.task_stats
 
     def run_tree_loop(self):
         tl.run_task_loop(self._run_tree)
@@ -39,6 +61,16 @@ class TaskRunner():
         scytr.SCYRunnerContext.sbycfg = self.sbycfg
         scytr.SCYRunnerContext.scycfg = self.scycfg
         scytr.SCYRunnerContext.task_steps = self.task_steps
+        scytr.SCYRunnerContext.task_covers = self.task_covers
+        scytr.SCYRunnerContext.task_proofs = self.task_proofs
+        scytr.SCYRunnerContext.task_progress = self.task_progress
+        scytr.SCYRunnerContext.task_variants = self.task_variants
+        scytr.SCYRunnerContext.dedup = self.dedup
+        scytr.SCYRunnerContext.state_merge = self.state_merge
+        scytr.SCYRunnerContext.task_states = self.task_states
+        scytr.SCYRunnerContext.task_started = self.task_started
+        scytr.SCYRunnerContext.prepared = self.prepared
+        scytr.SCYRunnerContext.task_stats = self.task_stats
         scytr.run_tree()
 
     def run_task_loop(self, task: TaskTree, recurse=True):
@@ -175,6 +207,33 @@ def test_tree_respects_setup(scycfg: SCYConfig):
                 sby_dirs.remove(task.dir)
     assert not sby_dirs
 
+@pytest.mark.usefixtures("run_tree")
+@pytest.mark.parametrize("scycfg", [
+    ({"args": {"setupmode": True}, "options": {"precheck": True}}),
+], indirect=True)
+def test_tree_makes_precheck(scycfg: SCYConfig):
+    precheck_sby = pathlib.Path(scycfg.args.workdir) / "precheck.sby"
+    assert precheck_sby.exists()
+    with open(precheck_sby, "r") as f:
+        precheck = f.read()
+    assert "select -assert-count 4 t:$cover" in precheck
+    assert "expect pass,fail" in precheck
+
+@pytest.mark.usefixtures("run_tree")
+@pytest.mark.parametrize("scycfg", [
+    ({"args": {"setupmode": True}, "options": {"unreach_proof": True}}),
+], indirect=True)
+def test_tree_makes_proof(scycfg: SCYConfig):
+    workdir = pathlib.Path(scycfg.args.workdir)
+    for task in scycfg.root.traverse():
+        if not task.cover_names:
+            continue
+        with open(workdir / f"{task.dir}_proof.sby", "r") as f:
+            proof = f.read()
+        assert "mode prove" in proof
+        assert "techmap -map cover_to_assert.v t:$cover" in proof
+        assert "[file cover_to_assert.v]" in proof
+
 def test_run_task(scytr_upcnt: TaskRunner):
     scytr_upcnt.sbycfg.options.append("mode cover")
     root_task = scytr_upcnt.scycfg.sequence[0]
@@ -249,3 +308,108 @@ def test_tree_with_appended(scytr_upcnt_with_common: TaskRunner, task: TaskTree,
     scytr_upcnt_with_common.scycfg.sequence[-1].add_child(task)
     with expectation:
         run_tree_loop_with_errors(scytr_upcnt_with_common)
+
+@pytest.mark.parametrize("scycfg", [
+    ({"options": {"stall_policy": "restart"}}),
+], indirect=True)
+def test_tree_bad_stall_policy(scytr_upcnt_with_common: TaskRunner):
+    with pytest.raises(SCYValueError, match="stall_policy must be one of"):
+        run_tree_loop_with_errors(scytr_upcnt_with_common)
+
+@pytest.mark.parametrize("task,e_str", [
+    (TaskTree("name", "cover", 0, asgmt="depht=5"), "unknown annotation"),
+    (TaskTree("name", "cover", 0, asgmt="timeout=soon"), "must be integer literal"),
+    (TaskTree("name", "cover", 0, asgmt="depth=deep"), "must be integer literal"),
+    (TaskTree("name", "cover", 0, asgmt="engine='abc bmc3"), "unable to parse annotations"),
+])
+def test_bad_annotation(scytr_upcnt: TaskRunner, task: TaskTree, e_str: str):
+    with pytest.raises(SCYValueError, match=e_str):
+        run_task_loop_with_errors(scytr_upcnt, task)
+
+@pytest.mark.parametrize("scycfg", [
+    ({"args": {"setupmode": True}, "options": {"dedup": True}}),
+], indirect=True)
+def test_tree_dedup(scytr_upcnt: TaskRunner):
+    scycfg = scytr_upcnt.scycfg
+    # pad with empty lines so that the duplicates get their own line numbers
+    duplicate = TaskTree.from_string("\n" * 20 + "cover cp_7:\n    cover cp_3\n    cover cp_12\n")
+    scycfg.root = TaskTree("", "common", 0)
+    scycfg.root.add_children(scycfg.sequence + duplicate)
+    scytr_upcnt.run_tree_loop()
+    aliased = {task.name: task.alias for task in scycfg.root.traverse() if task.alias}
+    assert set(aliased.keys()) == {"cp_7", "cp_3"}
+    for (name, alias) in aliased.items():
+        assert alias.name == name
+        assert alias.line < 20
+
+@pytest.mark.parametrize("scycfg", [
+    ({"options": {"state_merge": True}}),
+], indirect=True)
+def test_tree_state_merge(scytr_upcnt: TaskRunner):
+    scycfg = scytr_upcnt.scycfg
+    # cp_7 is reached directly and from cp_14, both continue to cp_12 from count == 7
+    sequence = TaskTree.from_string(dedent("""
+        cover cp_14:
+            cover cp_7:
+                cover cp_12:
+                    trace via_14
+        cover cp_7:
+            cover cp_12:
+                trace direct
+    """))
+    scycfg.root = TaskTree("", "common", 0)
+    scycfg.root.add_children(sequence)
+    scytr_upcnt.run_tree_loop()
+    covers = [task for task in scycfg.root.traverse() if task.name == "cp_12"]
+    assert len(covers) == 2
+    merged = [task for task in covers if task.merged]
+    assert len(merged) == 1
+    assert merged[0].merged in covers
+    assert not merged[0].merged.merged
+    workdir = pathlib.Path(scycfg.args.workdir)
+    # solved once, the merged chunk reuses the witness without running sby
+    assert not (workdir / merged[0].dir / "logfile.txt").exists()
+    for task in covers:
+        assert scytr_upcnt.task_steps[f"{task.linestr}_{task.name}"] == 5
+
+    # each trace follows its own path to the shared state
+    trace_steps = {}
+    for name in ["via_14", "direct"]:
+        with open(workdir / f"{name}.yw", "r") as f:
+            trace_steps[name] = len(json.load(f)["steps"])
+    assert trace_steps["via_14"] - trace_steps["direct"] == 14
+
+@pytest.mark.parametrize("contents,expected", [
+    (None, False),
+    ('{"format": "Yosys Witness Trace", "steps": [', False),
+    ('{"format": "Yosys Witness Trace", "steps": []}', True),
+])
+def test_witness_complete(tmp_path: pathlib.Path, contents: "str | None", expected: bool):
+    trace = tmp_path / "trace0.yw"
+    if contents is not None:
+        trace.write_text(contents)
+    assert scytr.witness_complete(trace) == expected
+
+def test_witness_steps(tmp_path: pathlib.Path):
+    trace = tmp_path / "trace0.yw"
+    trace.write_text(json.dumps({"format": "Yosys Witness Trace", "steps": [{}] * 8}))
+    assert scytr.witness_steps(trace) == 7
+
+def test_witness_complete_stale(tmp_path: pathlib.Path):
+    trace = tmp_path / "trace0.yw"
+    trace.write_text('{"format": "Yosys Witness Trace", "steps": []}')
+    os.utime(trace, (1000.0, 1000.0))
+    assert scytr.witness_complete(trace, 999.0)
+    assert not scytr.witness_complete(trace, 1001.0)
+
+def test_common_key(tmp_path: pathlib.Path):
+    for name in ["a", "b"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "top.sv").write_text("module top; endmodule")
+    sbycfg = SBYBridge({"options": ["depth 5"], "script": ["read -sv top.sv"], "files": ["../top.sv"]})
+    key = scytr.common_key(sbycfg, tmp_path / "a" / "run")
+    assert scytr.common_key(sbycfg, tmp_path / "b" / "run") == key
+    (tmp_path / "b" / "top.sv").write_text("module top2; endmodule")
+    assert scytr.common_key(sbycfg, tmp_path / "b" / "run") != key
+    sbycfg.set_option("multiclock", "on")
+    assert scytr.common_key(sbycfg, tmp_path / "a" / "run") != key
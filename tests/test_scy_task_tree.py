@@ -69,6 +69,7 @@ def test_mintree_reduce_depth(mintree: TaskTree, amount: int, expected: list):
         ("enable no body:\n", None, None, None, None),
         ("enable with body:\n ", "enable", "with", "body", " "),
         ("disable that:\n ", "disable", "that", None, " "),
+        ("cover_any a b c:\n body", "cover_any", "a", "b c", " body"),
 ])
 def test_task_from_string(input_str, stmt, name, asgmt, body):
     task_tree = first_tree_from_string(input_str)
@@ -290,6 +291,17 @@ def test_add_children(input_a: str, input_b: str, count: int):
     ("cover a",             "children",                  [],            False),
     ("cover a",             "parent",                    None,          False),
     ("cover a:\n #comment", "body",                      " #comment",   False),
+    ("cover_any a b",       "uses_sby",                 True,           False),
+    ("cover_any a b",       "is_runnable",              True,           False),
+    ("cover_any a b",       "cover_names",              ["a", "b"],     False),
+    ("cover_any a b",       "dir",                      "L001_000_a",   False),
+    ("cover a",             "cover_names",              ["a"],          False),
+    ("trace a",             "cover_names",              [],             False),
+    ("cover a timeout=5",   "cover_names",              ["a"],          False),
+    ("cover_any a b timeout=5", "cover_names",          ["a", "b"],     False),
+    ("cover a timeout=5",   "annotations",              {"timeout": "5"},False),
+    ("cover a",             "annotations",              {},             False),
+    ("trace a",             "annotations",              {},             False),
 ])
 def test_statement_properties(input_str, prop, expected, child):
     task_tree = first_tree_from_string(input_str)
@@ -314,6 +326,21 @@ def test_statement_callable(input_str, func, expected, child):
     actual = getattr(task_tree, func)()
     assert actual == expected
 
+@pytest.mark.parametrize([
+     "input_str",                       "key",      "expected",     "child"
+    ], [
+    ("cover a timeout=5",               "timeout",  "5",            False),
+    ("cover a",                         "timeout",  None,           False),
+    ("cover a timeout=5:\n cover b",    "timeout",  "5",            True),
+    ("cover a timeout=5:\n cover b timeout=9",
+                                        "timeout",  "9",            True),
+])
+def test_statement_annotation(input_str, key, expected, child):
+    task_tree = first_tree_from_string(input_str)
+    if child:
+        task_tree = task_tree.children[0]
+    assert task_tree.get_annotation(key) == expected
+
 @pytest.mark.parametrize([
      "func_or_prop",    "expected"
     ], [
@@ -383,3 +410,12 @@ def test_tree_print_lines(recurse: bool, line_counts_input: "dict[str, tuple[int
     assert len(actual.splitlines()) == expected
 
 #TODO: get_all_linestr(), start_cycle and stop_cycle
+
+def test_alias_follows():
+    trees = TaskTree.from_string("cover a:\n cover b\ncover a:\n cover c\n")
+    trees[1].alias = trees[0]
+    child = trees[1].children[0]
+    assert trees[1].get_dir() == trees[0].dir
+    assert trees[1].tracestr == trees[0].tracestr
+    assert child.get_dir() == child.dir
+    assert child.tracestr != trees[0].tracestr
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from scy.scy_timeline import Timeline, assign_lanes, trace_events
+
+def span(id: int, cat: str, start: float, end: float) -> dict:
+    return {"id": id, "name": f"task{id}", "cat": cat, "start": start, "end": end, "state": "done"}
+
+def test_timeline_lanes():
+    spans = assign_lanes([
+        span(1, "process", 0, 4),
+        span(2, "process", 1, 2),
+        span(3, "process", 2, 5),
+        span(4, "process", 4, 6),
+    ])
+    assert [span["lane"] for span in spans] == [0, 1, 1, 0]
+
+def test_timeline_events():
+    spans = [span(1, "task", 0, 1), span(2, "process", 1, 3), span(3, "process", 1.5, 2)]
+    events = trace_events(spans, [(1, 2), (1, 3), (4, 2)])
+    complete = [event for event in events if event["ph"] == "X"]
+    assert [event["name"] for event in complete] == ["task1", "task2", "task3"]
+    assert complete[2]["tid"] == 1
+    assert complete[1]["dur"] == 2000000
+    flows = [event for event in events if event["ph"] in ["s", "f"]]
+    assert len(flows) == 4
+    assert flows[1]["ts"] == complete[1]["ts"]
+
+def test_timeline_state_changes():
+    timeline = Timeline()
+    task = SimpleNamespace(state="pending", on_run=test_timeline_lanes)
+    event = SimpleNamespace(source=task)
+    for state in ["pending", "running", "running", "done", "failed"]:
+        task.state = state
+        timeline.on_event(event)
+    span = timeline.spans[id(task)]
+    assert span["name"] == "test_timeline_lanes"
+    assert span["cat"] == "task"
+    assert span["created"] <= span["start"] <= span["end"]
+    assert span["state"] == "done"
+    timeline.add_dependency(task, timeline)
+    assert timeline.edges == [(id(timeline), id(task))]
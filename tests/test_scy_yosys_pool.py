@@ -0,0 +1,43 @@
+import asyncio
+import pathlib
+import pytest
+
+from scy.scy_yosys_pool import YosysPool
+
+design_il = """
+module \\top
+  wire input 1 \\a
+  wire output 1 \\b
+  connect \\b \\a
+end
+"""
+
+@pytest.fixture
+def pool(tmp_path: pathlib.Path):
+    (tmp_path / "design.il").write_text(design_il)
+    return YosysPool(2, tmp_path, "design.il")
+
+def run_scripts(pool: YosysPool, scripts: "list[list[str]]"):
+    async def run_all():
+        try:
+            return await asyncio.gather(*(pool.run(script) for script in scripts))
+        finally:
+            pool.close()
+    return asyncio.run(run_all())
+
+def test_pool_runs_scripts(pool: YosysPool, tmp_path: pathlib.Path):
+    results = run_scripts(pool, [
+        ["read_rtlil design.il", "write_rtlil out_a.il"],
+        ["read_rtlil design.il", "rename top renamed", "write_rtlil out_b.il"],
+        ["read_rtlil design.il", "log hello"],
+    ])
+    assert [returncode for (returncode, _) in results] == [0, 0, 0]
+    assert "hello" in results[2][1]
+    assert len(pool.workers) == 2
+    assert "module \\renamed" in (tmp_path / "out_b.il").read_text()
+    # each job starts from the saved common design
+    assert "module \\top" in (tmp_path / "out_a.il").read_text()
+
+def test_pool_reports_errors(pool: YosysPool):
+    ((returncode, _), ) = run_scripts(pool, [["read_rtlil design.il", "select -assert-count 5 t:$cover"]])
+    assert returncode != 0